@@ -38,7 +38,7 @@
 #         GNSS coordinates, timestamps, etc.)
 #   - os:
 #       - Provides file and directory utilities (creating folders, building file paths)
-#       - Detects the operating system so we can use DirectShow on Windows
+#       - Detects the operating system so we can pick a camera backend on Windows
 #   - time:
 #       - Measures elapsed time for FPS (frames per second) calculations
 #       - Adds small delays during serial port probing so we don't overwhelm the device
@@ -49,13 +49,18 @@
 #       - The main computer vision library
 #       - Opens the camera, reads frames, displays the live preview window
 #       - Draws text overlays (resolution, FPS, GNSS coordinates) on the video feed
-#       - Saves still images as PNG and records video as AVI
+#       - Saves still images as PNG or JPEG and records video as AVI
+#   - numpy:
+#       - Array library OpenCV frames are built on; used to allocate small overlay images
 #   - math:
 #       - Provides trigonometric functions (tangent, radians)
 #       - Used to calculate meters-per-pixel from the camera's field of view and altitude
 #   - threading:
 #       - Runs background tasks in separate threads so they don't block the camera feed
-#       - The GNSS reader and Windows Location reader each run in their own thread
+#       - The GNSS reader, Windows Location reader, and video recorder each run in their own thread
+#   - queue:
+#       - Hands frames from the camera loop to the video recorder thread, and files to
+#         the file saver thread
 #   - typing:
 #       - Provides type hints (Optional, Tuple, Iterable) that document what kind of
 #         values a function expects and returns, making the code easier to understand
@@ -67,6 +72,16 @@
 #   - serial.tools.list_ports:
 #       - Discovers all serial ports on the system with their descriptions and hardware IDs
 #       - Helps users find which COM port their GNSS receiver is connected to
+#   - fractions:
+#       - Gives PyAV the video frame rate as an exact fraction (e.g., 30000/1001)
+#   - av (PyAV):
+#       - Python bindings for FFmpeg, used only for the hardware H.264 encoders
+#         (--encoder nvenc / qsv / v4l2m2m)
+#       - If PyAV is not installed, recording falls back to OpenCV's VideoWriter
+#   - orjson:
+#       - Fast JSON encoder written in Rust that outputs bytes directly
+#       - Used for the metadata sidecar files; if it is not installed, the standard
+#         json module is used instead (same output)
 #####################################################################################################################
 
 import argparse
@@ -75,8 +90,11 @@ import os
 import time
 from datetime import datetime, timezone
 import cv2
+import numpy as np
 import math
 import threading
+import queue
+from fractions import Fraction
 from typing import Iterable, Optional, Tuple
 
 # pyserial is optional - if it is not installed, serial features will print an
@@ -88,6 +106,22 @@ try:
 except ImportError:
     SERIAL_AVAILABLE = False
 
+# PyAV is optional - if it is not installed, the hardware encoders are unavailable
+# and recording uses OpenCV's VideoWriter instead
+try:
+    import av  # type: ignore
+    AV_AVAILABLE = True
+except ImportError:
+    AV_AVAILABLE = False
+
+# orjson is optional - if it is not installed, sidecar files are written with the
+# standard json module
+try:
+    import orjson  # type: ignore
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 
 
 
@@ -236,30 +270,89 @@ def runPortsCommand(args):
 #####################################################################################################################
 # Camera Initialization
 #   - Opens a camera by its index number using OpenCV
-#   - On Windows, tries the DirectShow backend first for better compatibility with USB
-#     cameras - DirectShow is a Windows media framework that gives more reliable access
-#     to camera settings like resolution and exposure
-#   - If DirectShow fails, falls back to the default OpenCV backend
+#   - On Windows, OpenCV can talk to cameras through two frameworks ("backends"):
+#       - Media Foundation (MSMF) - the current Windows media framework; usually negotiates
+#         MJPG cleanly, honors a 1-frame buffer, and adds less latency
+#       - DirectShow (DSHOW) - the older framework; works with almost every USB camera and
+#         gives reliable access to settings like exposure
+#   - --backend auto (the default) tries MSMF first, then DirectShow, then OpenCV's default;
+#     a backend only counts as working once it has delivered a test frame
+#   - --backend msmf / dshow forces one framework (still falling back to the default if it
+#     fails); --backend any uses OpenCV's default choice
 #   - On Linux/macOS, always uses the default backend (V4L2 on Linux, AVFoundation on Mac)
 #
 #   Parameters:
-#       index (int)     - camera index number (0 = first camera, 1 = second, etc.)
-#       useDshow (bool) - whether to try DirectShow backend on Windows
+#       index (int)    - camera index number (0 = first camera, 1 = second, etc.)
+#       backend (str)  - "auto", "msmf", "dshow", or "any" (from --backend)
 #
 #   Returns:
 #       cv2.VideoCapture - an OpenCV camera capture object (check .isOpened() before use)
 #####################################################################################################################
 
-def openCamera(index: int, useDshow: bool) -> cv2.VideoCapture:
-    """Open a camera by index, with optional DirectShow backend on Windows."""
-    backend = cv2.CAP_DSHOW if (os.name == "nt" and useDshow) else 0
-    cameraCapture = cv2.VideoCapture(index, backend)
+CAMERA_BACKENDS = {
+    "msmf": ("Media Foundation", cv2.CAP_MSMF),
+    "dshow": ("DirectShow", cv2.CAP_DSHOW),
+}
+
+
+def openCamera(index: int, backend: str = "auto") -> cv2.VideoCapture:
+    """Open a camera by index, trying the preferred Windows backends first."""
+    if os.name != "nt" or backend == "any":
+        return cv2.VideoCapture(index)
+
+    candidates = ["msmf", "dshow"] if backend == "auto" else [backend]
+    for name in candidates:
+        label, apiPreference = CAMERA_BACKENDS[name]
+        cameraCapture = cv2.VideoCapture(index, apiPreference)
+        # Some backends "open" a camera they can't actually stream from, so read a test frame
+        if cameraCapture.isOpened() and cameraCapture.read()[0]:
+            print(f"[INFO] Camera backend: {label}")
+            return cameraCapture
+        cameraCapture.release()
+
+    # None of the preferred backends worked - let OpenCV choose
+    print("[WARN] Preferred camera backend unavailable; using OpenCV's default")
+    return cv2.VideoCapture(index)
+
+
+
+
+#####################################################################################################################
+# Camera Pixel Format
+#   - USB cameras send frames either uncompressed (YUYV, 2 bytes per pixel) or JPEG-compressed
+#     by the camera itself (MJPG)
+#   - Many ELP cameras default to YUYV, which fills USB 2.0 bandwidth at 720p and above and
+#     limits the frame rate; MJPG sends 4-10x less data and OpenCV decodes it quickly
+#   - --pixfmt auto (the default) picks MJPG for 1280x720 and larger, and leaves the
+#     camera's default alone for smaller sizes
+#   - fourccToStr() turns the number OpenCV reports back into text (e.g., "MJPG") so the
+#     format the camera actually agreed to can be printed
+#
+#   Parameters:
+#       pixfmt (str)  - "auto", "mjpg", or "yuyv" (from --pixfmt)
+#       width (int)   - requested frame width (0 = camera default)
+#       height (int)  - requested frame height (0 = camera default)
+#
+#   Returns:
+#       str or None - FourCC to request from the camera, or None to leave it unchanged
+#####################################################################################################################
+
+PIXEL_FORMATS = {"mjpg": "MJPG", "yuyv": "YUYV"}
 
-    # If DirectShow failed on Windows, try the default backend as a fallback
-    if not cameraCapture.isOpened() and backend == cv2.CAP_DSHOW:
-        cameraCapture = cv2.VideoCapture(index)
 
-    return cameraCapture
+def capturePixelFormat(pixfmt: str, width: int, height: int) -> Optional[str]:
+    """Return the FourCC to request from the camera, or None to keep its default."""
+    if pixfmt == "auto":
+        return "MJPG" if width >= 1280 or height >= 720 else None
+    return PIXEL_FORMATS[pixfmt]
+
+
+def fourccToStr(fourcc: float) -> str:
+    """Convert a FourCC code reported by OpenCV into its four-letter name."""
+    code = int(fourcc)
+    if code <= 0:
+        return "unknown"
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
 
 
 
@@ -292,11 +385,47 @@ def ensureDir(path: str):
 #       frame (numpy.ndarray) - the camera frame to draw on (modified in place)
 #       text (str)            - the text string to display
 #       y (int)               - vertical pixel position for the text (default: 20)
+#
+#   Text sprites:
+#     - Anti-aliased text is re-rasterized glyph by glyph on every putText() call, which
+#       adds up when the same line is drawn 30-60 times a second
+#     - makeTextSprite() draws a line once onto a small image and keeps a mask of the
+#       pixels the text covers; drawSprite() then just copies those pixels into each frame
+#     - Used for lines that rarely change (hotkey help, FPS text that updates every few frames)
 #####################################################################################################################
 
+OVERLAY_FONT = cv2.FONT_HERSHEY_SIMPLEX
+OVERLAY_SCALE = 0.5
+OVERLAY_COLOR = (0, 255, 255)  # Yellow (BGR)
+SPRITE_PAD = 2  # Pixels around the text so anti-aliased edges aren't clipped
+
+
 def putOverlay(frame, text: str, y: int = 20):
     """Draw yellow text on a camera frame at the given vertical position."""
-    cv2.putText(frame, text, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1, cv2.LINE_AA)
+    cv2.putText(frame, text, (10, y), OVERLAY_FONT, OVERLAY_SCALE, OVERLAY_COLOR, 1, cv2.LINE_AA)
+
+
+def makeTextSprite(text: str) -> Tuple:
+    """Pre-render an overlay line; returns (sprite, mask, ascent) for drawSprite()."""
+    (width, ascent), baseline = cv2.getTextSize(text, OVERLAY_FONT, OVERLAY_SCALE, 1)
+    height = ascent + baseline + 2 * SPRITE_PAD
+    sprite = np.zeros((height, width + 2 * SPRITE_PAD, 3), dtype=np.uint8)
+    cv2.putText(sprite, text, (SPRITE_PAD, SPRITE_PAD + ascent), OVERLAY_FONT, OVERLAY_SCALE, OVERLAY_COLOR, 1, cv2.LINE_AA)
+    mask = cv2.cvtColor(sprite, cv2.COLOR_BGR2GRAY)
+    return sprite, mask, ascent
+
+
+def drawSprite(frame, textSprite: Tuple, y: int = 20):
+    """Copy a pre-rendered overlay line onto a frame, where putOverlay() would have drawn it."""
+    sprite, mask, ascent = textSprite
+    top = y - ascent - SPRITE_PAD
+    left = 10 - SPRITE_PAD
+    height = min(sprite.shape[0], frame.shape[0] - top)
+    width = min(sprite.shape[1], frame.shape[1] - left)
+    if top < 0 or height <= 0 or width <= 0:
+        return
+    region = frame[top:top + height, left:left + width]
+    cv2.copyTo(sprite[:height, :width], mask[:height, :width], region)
 
 
 
@@ -802,21 +931,305 @@ def formatMppLabel(mpp: Optional[float]) -> Optional[str]:
 #   - nowUtcIso() generates a timestamp string in ISO-8601 format using UTC time
 #     (e.g., "2025-02-22T18-30-45.123456Z"). Colons are replaced with hyphens so the
 #     string is safe to use in filenames on all operating systems.
+#   - Formatting the string is the slow part (~3 us), so it is split from reading the
+#     clock: captureTimeNs() just reads the wall clock as integer nanoseconds (cheap
+#     enough for every frame), and formatUtcIso() turns such a value into the string
+#     only when a filename or sidecar actually needs it
 #   - sidecarMetadata() saves a JSON file alongside a captured photo containing all the
 #     camera settings, GNSS coordinates, and scale information at the moment of capture.
 #     The JSON file has the same name as the photo but with a .json extension.
+#   - The JSON is encoded with orjson when it is installed (falls back to json), and
+#     written with a single os.write() call instead of going through a text file object
+#   - When a FileSaver is passed in, the write is handed to its thread so the camera
+#     loop never waits on the disk
 #####################################################################################################################
 
+def captureTimeNs() -> int:
+    """Return the current wall-clock time as integer nanoseconds since the Unix epoch."""
+    return time.time_ns()
+
+
+def formatUtcIso(timeNs: int) -> str:
+    """Format a captureTimeNs() value as an ISO-8601 UTC string safe for filenames."""
+    seconds, nanoseconds = divmod(timeNs, 1_000_000_000)
+    moment = datetime.fromtimestamp(seconds, timezone.utc).replace(microsecond=nanoseconds // 1000)
+    return moment.strftime("%Y-%m-%dT%H-%M-%S.%fZ")
+
+
 def nowUtcIso() -> str:
     """Return the current UTC time as an ISO-8601 string safe for filenames."""
-    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H-%M-%S.%fZ")
+    return formatUtcIso(captureTimeNs())
+
 
+def metadataJson(metadata: dict) -> bytes:
+    """Encode a metadata dictionary as indented UTF-8 JSON bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(metadata, option=orjson.OPT_INDENT_2)
+    return json.dumps(metadata, indent=2).encode("utf-8")
 
-def sidecarMetadata(pngPath: str, metadata: dict):
+
+def writeFileBytes(path: str, data: bytes):
+    """Write bytes to a file (created or truncated) with as few system calls as possible."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]  # os.write may write less than asked
+    finally:
+        os.close(fd)
+
+
+def sidecarMetadata(imagePath: str, metadata: dict, saver=None):
     """Save a JSON metadata sidecar file next to a captured image."""
-    metadataPath = os.path.splitext(pngPath)[0] + ".json"
-    with open(metadataPath, "w", encoding="utf-8") as file:
-        json.dump(metadata, file, indent=2)
+    metadataPath = os.path.splitext(imagePath)[0] + ".json"
+    data = metadataJson(metadata)
+    if saver is not None:
+        saver.submit(metadataPath, data)
+    else:
+        writeFileBytes(metadataPath, data)
+
+
+
+
+#####################################################################################################################
+# Background File Saving
+#   - Compressing a 1280x720 frame to PNG takes 30-80 ms, and opening/writing/closing
+#     files can stall on an SD card or a busy USB drive; done in the camera loop, either
+#     one drops preview frames
+#   - FileSaver does that work in its own thread: the camera loop hands over the path
+#     and either finished bytes (submit) or a frame to compress (submitImage) and carries
+#     on immediately
+#   - Frames are copied when queued, because the camera loop reuses its frame buffer
+#   - Still image settings:
+#       - PNG compression level (--pngLevel): 0-9, default 1. Level 1 is several times
+#         faster than OpenCV's default of 3 and the files are only slightly larger
+#       - JPEG (--stillFormat jpg) is saved at quality 95 and is about 10x faster than PNG
+#   - Unlike the video recorder's queue, this queue is not size-limited - captures are
+#     rare, and a saved photo must never be dropped
+#   - Files are written in the order they were queued, so a photo is always on disk
+#     before its sidecar; stop() waits until everything queued has been written
+#
+#   How it works:
+#       1. The start() method launches a daemon thread that runs the _run() method
+#       2. _run() takes jobs off the queue, compresses images with cv2.imencode() when
+#          needed, and writes the bytes until it gets None
+#       3. The stop() method queues None and waits for the thread to finish
+#####################################################################################################################
+
+JPEG_QUALITY = 95
+
+
+def stillEncodeParams(stillFormat: str, pngLevel: int) -> Tuple[str, list]:
+    """Return the file extension and cv2.imencode() parameters for a still image format."""
+    if stillFormat == "jpg":
+        return ".jpg", [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY]
+    return ".png", [cv2.IMWRITE_PNG_COMPRESSION, pngLevel]
+
+
+class FileSaver:
+    """Background thread that compresses captured frames and writes queued files to disk."""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = None
+
+    def start(self):
+        """Start the background writing thread."""
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, path: str, data: bytes):
+        """Queue a file to be written."""
+        self.queue.put((path, data, None))
+
+    def submitImage(self, path: str, frame, encodeParams: list):
+        """Queue a copy of a frame to be compressed (format taken from the path's extension) and written."""
+        self.queue.put((path, frame.copy(), encodeParams))
+
+    def stop(self):
+        """Write the files still queued, then end the thread."""
+        self.queue.put(None)
+        if self.thread:
+            self.thread.join()
+
+    def _run(self):
+        """Main loop for the background thread - writes files until it gets None."""
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            path, data, encodeParams = job
+            try:
+                if encodeParams is not None:
+                    success, encoded = cv2.imencode(os.path.splitext(path)[1], data, encodeParams)
+                    if not success:
+                        print(f"[ERROR] Could not encode {path}")
+                        continue
+                    data = encoded
+                writeFileBytes(path, data)
+            except (OSError, cv2.error) as e:
+                print(f"[ERROR] Could not save {path}: {e}")
+
+
+
+
+#####################################################################################################################
+# Hardware Video Encoding (PyAV)
+#   - OpenCV's VideoWriter encodes on the CPU (MJPG by default), which can limit how
+#     fast a high-resolution recording runs on a laptop or a Raspberry Pi
+#   - With --encoder, recordings are encoded as H.264 by a hardware encoder through
+#     PyAV (FFmpeg) instead:
+#       - nvenc    --> NVIDIA GPUs (h264_nvenc, low-latency preset)
+#       - qsv      --> Intel integrated graphics (h264_qsv)
+#       - v4l2m2m  --> Raspberry Pi 4 hardware encoder (h264_v4l2m2m)
+#   - PyAvVideoWriter has the same write() / release() / isOpened() methods as
+#     cv2.VideoWriter, so the preview loop does not care which one it got
+#   - If PyAV is missing or the encoder can't be opened (no GPU, driver missing),
+#     openVideoWriter() prints a warning and falls back to cv2.VideoWriter
+#
+#   Parameters:
+#       outputPath (str)  - file to record to (.mp4 recommended for H.264)
+#       encoder (str)     - "opencv" or one of the HARDWARE_ENCODERS keys
+#       fourcc (int)      - OpenCV codec code, used by the OpenCV fallback
+#       fps (float)       - recording frame rate
+#       size (tuple)      - (width, height) of the frames in pixels
+#
+#   Returns:
+#       PyAvVideoWriter or cv2.VideoWriter - check .isOpened() before use
+#####################################################################################################################
+
+# --encoder name --> (FFmpeg codec, pixel format the encoder takes, encoder options)
+HARDWARE_ENCODERS = {
+    "nvenc": ("h264_nvenc", "yuv420p", {"preset": "p4", "tune": "ll"}),
+    "qsv": ("h264_qsv", "nv12", {"preset": "veryfast"}),
+    "v4l2m2m": ("h264_v4l2m2m", "yuv420p", {}),
+}
+HARDWARE_BITRATE = 8_000_000  # bits per second - FFmpeg's 2 Mbit/s default is too low for 720p
+
+
+class PyAvVideoWriter:
+    """Record H.264 video through an FFmpeg hardware encoder, with the cv2.VideoWriter interface."""
+
+    def __init__(self, outputPath: str, encoder: str, fps: float, size: Tuple[int, int]):
+        codecName, self.pixFmt, options = HARDWARE_ENCODERS[encoder]
+        self.container = av.open(outputPath, "w")
+        try:
+            self.stream = self.container.add_stream(codecName, rate=Fraction(fps).limit_denominator(1001))
+            self.stream.width, self.stream.height = size
+            self.stream.pix_fmt = self.pixFmt
+            self.stream.bit_rate = HARDWARE_BITRATE
+            self.stream.options = options
+            # Open the encoder now so a missing GPU/driver fails here, not on the first frame
+            self.stream.codec_context.open()
+        except Exception:
+            self.container.close()
+            raise
+        self.frameIndex = 0
+
+    def isOpened(self) -> bool:
+        """Return True until release() has been called."""
+        return self.container is not None
+
+    def write(self, frame):
+        """Encode one BGR frame and write the finished packets to the file."""
+        if self.pixFmt == "yuv420p":
+            # OpenCV's converter is faster than letting FFmpeg convert from BGR
+            videoFrame = av.VideoFrame.from_ndarray(cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420), format="yuv420p")
+        else:
+            videoFrame = av.VideoFrame.from_ndarray(frame, format="bgr24")
+        videoFrame.pts = self.frameIndex
+        self.frameIndex += 1
+        for packet in self.stream.encode(videoFrame):
+            self.container.mux(packet)
+
+    def release(self):
+        """Flush the frames still inside the encoder and close the file."""
+        if self.container is None:
+            return
+        for packet in self.stream.encode():
+            self.container.mux(packet)
+        self.container.close()
+        self.container = None
+
+
+def openVideoWriter(outputPath: str, encoder: str, fourcc: int, fps: float, size: Tuple[int, int]):
+    """Open a video writer for the chosen encoder, falling back to OpenCV's VideoWriter."""
+    if encoder != "opencv":
+        if not AV_AVAILABLE:
+            print("[WARN] PyAV is not installed (pip install av); recording with OpenCV instead")
+        else:
+            try:
+                writer = PyAvVideoWriter(outputPath, encoder, fps, size)
+                print(f"[INFO] Hardware encoder: {HARDWARE_ENCODERS[encoder][0]}")
+                return writer
+            except Exception as e:
+                print(f"[WARN] Could not open {HARDWARE_ENCODERS[encoder][0]} ({e}); recording with OpenCV instead")
+    return cv2.VideoWriter(outputPath, fourcc, fps, size)
+
+
+
+
+#####################################################################################################################
+# Background Video Recording
+#   - Encoding a frame (MJPG or H.264) can take 15-25 ms at high resolutions; doing it in
+#     the camera loop would delay the next frame read and lower the preview/capture FPS
+#   - VideoRecorder runs the video writer in its own thread instead:
+#       - the camera loop hands each frame over with submit() and carries on immediately
+#       - the recorder thread writes frames to the file in the order they arrived
+#   - The hand-over queue only holds a few frames; if the encoder falls behind, new frames
+#     are dropped (and counted) rather than letting memory grow or stalling the camera
+#   - Frames are copied when queued, because the camera loop reuses and draws on its buffer
+#
+#   How it works:
+#       1. The start() method launches a daemon thread that runs the _run() method
+#       2. _run() takes frames off the queue and writes them until it gets None
+#       3. The stop() method queues None, waits for the thread to finish the frames
+#          already queued, then releases (closes) the video writer
+#####################################################################################################################
+
+class VideoRecorder:
+    """Background thread that writes queued frames to a video writer."""
+
+    def __init__(self, writer, maxQueued: int = 4):
+        self.writer = writer
+        self.queue = queue.Queue(maxsize=maxQueued)
+        self.thread = None
+        self.dropped = 0
+        self.error = None
+
+    def start(self):
+        """Start the background writing thread."""
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, frame):
+        """Queue a copy of a frame for writing, or drop it if the queue is full."""
+        if self.queue.full():
+            self.dropped += 1
+            return
+        self.queue.put_nowait(frame.copy())
+
+    def stop(self):
+        """Write the frames still queued, then close the video file."""
+        self.queue.put(None)
+        if self.thread:
+            self.thread.join()
+        self.writer.release()
+
+    def _run(self):
+        """Main loop for the background thread - writes frames until it gets None."""
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                return
+            try:
+                self.writer.write(frame)
+            except Exception as e:
+                self.error = str(e)  # Keep draining so stop() never waits on a full queue
 
 
 
@@ -826,11 +1239,20 @@ def sidecarMetadata(pngPath: str, metadata: dict):
 #   - Opens the camera and displays a live preview window using OpenCV
 #   - Overlays on the video feed: resolution, FPS, GNSS coordinates, scale bar
 #   - Hotkeys during preview:
-#       c --> capture a still photo (saved as PNG with JSON sidecar metadata)
-#       r --> start/stop video recording (saved as AVI)
+#       c --> capture a still photo (saved as PNG or JPEG with JSON sidecar metadata)
+#       r --> start/stop video recording (saved as AVI, or MP4 with a hardware --encoder)
 #       q --> quit the preview and close the camera
-#   - The FPS display uses an exponential moving average (EMA) for smooth readings
+#   - The FPS display uses an exponential moving average (EMA) for smooth readings, and its
+#     text is refreshed every FPS_TEXT_EVERY frames rather than re-drawn from scratch each frame
 #   - GNSS coordinates are read from a background thread (GNSSReader or WindowsLocationReader)
+#   - --previewDownscale N shows a 1/N size copy in the window; at high resolutions, sending
+#     full frames to the window system costs far more than the cv2.resize() (INTER_AREA)
+#     that shrinks them. Recording and photos keep the full-resolution frame.
+#   - Photos (c) follow the recording rule: the clean frame by default, the frame with the
+#     overlays drawn in with --burnOverlays, the same at every --previewDownscale
+#   - Hotkeys are checked with cv2.pollKey(), which returns immediately; cv2.waitKey(1) can
+#     block for 5-10 ms on some backends and cap the loop near 100 FPS, so it is only called
+#     every KEY_PUMP_EVERY frames to keep the window responsive (older OpenCV: every frame)
 #
 #   Parameters:
 #       args (Namespace) - parsed CLI arguments with all camera and GNSS settings
@@ -839,10 +1261,17 @@ def sidecarMetadata(pngPath: str, metadata: dict):
 #       1. Create output directories for photos and videos
 #       2. Open the camera and apply resolution/FPS/exposure settings
 #       3. Optionally start a GNSS reader (serial or Windows Location API)
-#       4. Enter the main loop: read frame --> draw overlays --> check hotkeys --> repeat
+#       4. Enter the main loop: read frame --> queue the clean frame for recording -->
+#          draw overlays --> check hotkeys --> repeat (frames are encoded by the
+#          VideoRecorder thread; --burnOverlays records the frame after the overlays instead)
 #       5. On exit, release the camera, close windows, and stop the GNSS reader
 #####################################################################################################################
 
+FPS_TEXT_EVERY = 8  # Frames between updates of the FPS overlay text
+KEY_PUMP_EVERY = 8  # Frames between full waitKey() calls when pollKey() is available
+HAS_POLL_KEY = hasattr(cv2, "pollKey")  # OpenCV 4.5+
+
+
 def runLivePreview(args):
     """Launch the live camera preview with overlays and capture/record support."""
 
@@ -855,15 +1284,29 @@ def runLivePreview(args):
     ensureDir(photosDir)
     ensureDir(videosDir)
 
+    # ============================================================
+    # SETUP - OpenCV threading
+    # ============================================================
+    # OpenCV's own worker pool defaults to one thread per core; with the camera loop, the
+    # recorder thread, and the file saver also running, that oversubscribes the CPU and
+    # makes frame timing jittery. The preview's OpenCV calls are small and need only a few.
+    cv2.setUseOptimized(True)  # Use the SIMD (SSE/AVX/NEON) code paths
+    cv2.setNumThreads(args.cvThreads)
+
     # ============================================================
     # SETUP - Open camera and apply settings
     # ============================================================
-    cameraCapture = openCamera(args.index, useDshow=not args.noDshow)
+    cameraCapture = openCamera(args.index, "any" if args.noDshow else args.backend)
     if not cameraCapture.isOpened():
         print("[ERROR] Camera not detected. Try a different index or check the USB connection.")
         return
 
     cameraCapture.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Minimize frame buffer lag
+    # The pixel format must be chosen before the resolution/FPS (DirectShow and V4L2
+    # only offer the higher modes once MJPG is selected)
+    pixelFormat = capturePixelFormat(args.pixfmt, args.width, args.height)
+    if pixelFormat:
+        cameraCapture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*pixelFormat))
     if args.width > 0:
         cameraCapture.set(cv2.CAP_PROP_FRAME_WIDTH, args.width)
     if args.height > 0:
@@ -878,13 +1321,16 @@ def runLivePreview(args):
     actualWidth = int(cameraCapture.get(cv2.CAP_PROP_FRAME_WIDTH))
     actualHeight = int(cameraCapture.get(cv2.CAP_PROP_FRAME_HEIGHT))
     nominalFps = cameraCapture.get(cv2.CAP_PROP_FPS) or args.fps or 0
+    print(f"[INFO] Camera pixel format: {fourccToStr(cameraCapture.get(cv2.CAP_PROP_FOURCC))}")
 
     # ============================================================
     # SETUP - Recording state
     # ============================================================
     fourcc = cv2.VideoWriter_fourcc(*args.codec)
-    isRecording = False
-    videoWriter = None
+    recorder = None  # VideoRecorder while recording, None otherwise
+    fileSaver = FileSaver()  # Compresses and writes photos and sidecar files off the camera loop
+    fileSaver.start()
+    stillExt, stillParams = stillEncodeParams(args.stillFormat, args.pngLevel)
     pendingRecordPath = args.record if args.record else None
 
     # ============================================================
@@ -919,6 +1365,12 @@ def runLivePreview(args):
     alpha = 0.2  # Smoothing factor (0.0 = very smooth, 1.0 = no smoothing)
     lastTime = time.perf_counter()
 
+    # Overlay lines that rarely change are pre-rendered once (see makeTextSprite); the FPS
+    # line is only re-rendered every FPS_TEXT_EVERY frames, which is still several times a second
+    helpSprite = makeTextSprite("[c] Capture  [r] Record  [q] Quit")
+    fpsSprite = None
+    frameCount = 0
+
     # Print startup info
     print("[INFO] Hotkeys: q quit | c capture | r record")
     if args.gnssPort:
@@ -936,31 +1388,145 @@ def runLivePreview(args):
     if args.scale:
         print("[INFO] Scale bar: enabled (requires --mpp or --hfov + altitude)")
 
+    # ============================================================
+    # CAPTURE PHOTO - save PNG/JPEG + JSON sidecar (written by the FileSaver thread)
+    # ============================================================
+    # Photos follow the same rule as recordings: the clean frame, or with --burnOverlays the
+    # frame after the overlays are drawn - whatever --previewDownscale is set to
+    photoPending = False  # The c key was pressed; the photo is taken from the next frame
+
+    def capturePhoto(photoFrame):
+        """Queue photoFrame as a still photo plus its JSON sidecar."""
+        captureNs = captureTimeNs()
+        timestamp = formatUtcIso(captureNs)
+        baseName = f"IMG_{timestamp}_{actualWidth}x{actualHeight}"
+        imagePath = os.path.join(photosDir, baseName + stillExt)
+        fileSaver.submitImage(imagePath, photoFrame, stillParams)
+        metadata = {
+            "timestampUtc": timestamp,
+            "timestampUnixNs": captureNs,
+            "cameraIndex": args.index,
+            "frameWidth": actualWidth,
+            "frameHeight": actualHeight,
+            "requestedFps": args.fps,
+            "measuredFps": round(fpsEma, 2),
+            "exposure": cameraCapture.get(cv2.CAP_PROP_EXPOSURE),
+            "gain": cameraCapture.get(cv2.CAP_PROP_GAIN),
+            "codec": args.codec,
+            "encoder": args.encoder,
+            "software": "Camera_System.py",
+        }
+        if gnss and not getattr(gnss, "error", None):
+            if gnss.latest.get("lat") is not None and gnss.latest.get("lon") is not None:
+                metadata["gnss"] = {
+                    "lat": gnss.latest.get("lat"),
+                    "lon": gnss.latest.get("lon"),
+                    "altMslM": gnss.latest.get("alt"),
+                }
+                if gnss.latest.get("hdop") is not None:
+                    metadata["gnss"]["hdop"] = gnss.latest.get("hdop")
+        if args.scale:
+            altM = args.alt if args.alt is not None else (gnss.latest.get("alt") if gnss else None)
+            mpp2 = estimateMpp(actualWidth, altM, args.hfov, args.mpp)
+            if mpp2:
+                metadata["scale"] = {
+                    "metersPerPixel": mpp2,
+                    "altitudeM": altM,
+                    "hfovDeg": args.hfov,
+                }
+        sidecarMetadata(imagePath, metadata, fileSaver)
+        print(f"[INFO] Saved still --> {imagePath}")
+
     # ============================================================
     # MAIN LOOP - Read frames, draw overlays, handle hotkeys
     # ============================================================
+    # The frame buffer is reused: read() decodes each new frame into the previous frame's
+    # array instead of allocating a fresh one (~2.8 MB at 1280x720) every time
+    frame = None
+
+    # Functions called on every frame, looked up once here instead of as module/object
+    # attributes on every pass through the loop
+    captureRead = cameraCapture.read
+    perfCounter = time.perf_counter
+    showFrame = cv2.imshow
+    pollKey = cv2.pollKey if HAS_POLL_KEY else None
+    waitKey = cv2.waitKey
+    windowProperty = cv2.getWindowProperty
+    windowVisible = cv2.WND_PROP_VISIBLE
+    resizeImage = cv2.resize
+
+    # Preview downscaling (--previewDownscale): the window shows a smaller copy of each frame,
+    # while recording and photos still use the full-resolution frame
+    downscale = max(1, args.previewDownscale)
+    drawOnPreview = downscale > 1 and not args.burnOverlays
+    viewScale = downscale if drawOnPreview else 1  # Full-frame pixels per overlay pixel
+    previewBuffer = None
+
     while True:
-        success, frame = cameraCapture.read()
-        if not success or frame is None:
+        success, readFrame = captureRead(frame)
+        if not success or readFrame is None:
             print("[ERROR] Failed to grab frame from camera")
             break
 
-        # Update actual dimensions if the camera changed them
-        if frame.shape[1] != actualWidth or frame.shape[0] != actualHeight:
-            actualWidth = frame.shape[1]
-            actualHeight = frame.shape[0]
+        # read() only hands back a new array on the first frame or when the frame size
+        # changed, so the dimensions are looked up only then instead of on every frame
+        if readFrame is not frame:
+            frame = readFrame
+            actualHeight, actualWidth = frame.shape[:2]
+            fpsSprite = None  # The resolution in the FPS line changed
+            previewSize = (max(1, actualWidth // downscale), max(1, actualHeight // downscale))
+            previewBuffer = None  # Reallocated by the next resize at the new size
 
         # ---- FPS calculation (exponential moving average) ----
-        currentTime = time.perf_counter()
+        currentTime = perfCounter()
         deltaTime = currentTime - lastTime
         lastTime = currentTime
         instantFps = (1.0 / deltaTime) if deltaTime > 0 else 0.0
         fpsEma = instantFps if fpsEma == 0 else (alpha * instantFps + (1 - alpha) * fpsEma)
 
+        # ---- Auto-start recording if --record was passed ----
+        if pendingRecordPath and recorder is None:
+            outputPath = pendingRecordPath
+            if not os.path.isabs(outputPath) and not outputPath.startswith(args.saveDir):
+                if os.path.dirname(outputPath):
+                    outputPath = os.path.join(args.saveDir, outputPath)
+                else:
+                    outputPath = os.path.join(videosDir, outputPath)
+            ensureDir(os.path.dirname(outputPath) or ".")
+            videoFps = nominalFps if nominalFps and nominalFps > 0 else max(1.0, fpsEma)
+            videoWriter = openVideoWriter(outputPath, args.encoder, fourcc, videoFps, (actualWidth, actualHeight))
+            if videoWriter.isOpened():
+                recorder = VideoRecorder(videoWriter)
+                recorder.start()
+                print(f"[INFO] Recording started --> {outputPath}")
+            else:
+                print(f"[ERROR] Failed to start recording --> {outputPath}")
+            pendingRecordPath = None
+
+        # Hand the clean frame to the recorder thread before any overlays are drawn on it,
+        # unless --burnOverlays asks for the overlays in the video (queued further down)
+        if recorder is not None and not args.burnOverlays:
+            recorder.submit(frame)
+        if photoPending and not args.burnOverlays:
+            capturePhoto(frame)
+            photoPending = False
+
+        # ---- Preview image ----
+        # Overlays go on a downscaled copy when --previewDownscale is set, so the window is
+        # sent a fraction of the pixels (with --burnOverlays they go on the full frame and
+        # the copy is made afterwards, so the recording still gets them)
+        if drawOnPreview:
+            previewBuffer = resizeImage(frame, previewSize, dst=previewBuffer, interpolation=cv2.INTER_AREA)
+            view = previewBuffer
+        else:
+            view = frame
+
         # ---- Status overlays ----
-        resolutionLine = f"{actualWidth}x{actualHeight} | FPS: {fpsEma:4.1f}"
-        putOverlay(frame, resolutionLine)
-        putOverlay(frame, "[c] Capture  [r] Record  [q] Quit", y=40)
+        if fpsSprite is None or frameCount % FPS_TEXT_EVERY == 0:
+            fpsSprite = makeTextSprite(f"{actualWidth}x{actualHeight} | FPS: {fpsEma:4.1f}")
+        frameCount += 1
+        drawSprite(view, fpsSprite)
+        drawSprite(view, helpSprite, y=40)
 
         # ---- GNSS overlay ----
         gnssLat = None
@@ -970,7 +1536,7 @@ def runLivePreview(args):
         if gnss:
             if getattr(gnss, "error", None):
                 gnssErrorLine = f"[ERROR] GNSS: {gnss.error}"
-                putOverlay(frame, gnssErrorLine, y=60)
+                putOverlay(view, gnssErrorLine, y=60)
             else:
                 gnssLat = gnss.latest.get("lat")
                 gnssLon = gnss.latest.get("lon")
@@ -982,119 +1548,83 @@ def runLivePreview(args):
                     altStr = f" alt {gnssAlt:.1f} m" if gnssAlt is not None else ""
                     hdopStr = f" HDOP {hdop:.1f} m" if isinstance(hdop, (int, float)) else ""
                     gnssLine = f"GNSS: {latStr}, {lonStr}{altStr}{hdopStr}"
-                    putOverlay(frame, gnssLine, y=60)
+                    putOverlay(view, gnssLine, y=60)
                 else:
-                    putOverlay(frame, "GNSS: searching...", y=60)
+                    putOverlay(view, "GNSS: searching...", y=60)
         else:
             if args.alt is not None:
                 altLine = f"Alt: {args.alt:.1f} m (manual)"
             else:
                 altLine = "GNSS: disabled (use --gnssPort)"
-            putOverlay(frame, altLine, y=60)
+            putOverlay(view, altLine, y=60)
 
         # ---- Scale bar overlay ----
         altMForScale = args.alt if args.alt is not None else (gnssAlt if gnssAlt is not None else None)
         mpp = estimateMpp(actualWidth, altMForScale, args.hfov, args.mpp)
         label = formatMppLabel(mpp)
         if label:
-            putOverlay(frame, label, y=80)
+            putOverlay(view, label, y=80)
             if args.scale:
-                drawScaleBar(frame, mpp)
+                drawScaleBar(view, mpp * viewScale)  # Scale bar is in preview pixels
         else:
-            putOverlay(frame, "Scale: set --mpp or --hfov + altitude", y=80)
-
-        # ---- Auto-start recording if --record was passed ----
-        if pendingRecordPath and videoWriter is None:
-            outputPath = pendingRecordPath
-            if not os.path.isabs(outputPath) and not outputPath.startswith(args.saveDir):
-                if os.path.dirname(outputPath):
-                    outputPath = os.path.join(args.saveDir, outputPath)
-                else:
-                    outputPath = os.path.join(videosDir, outputPath)
-            ensureDir(os.path.dirname(outputPath) or ".")
-            videoFps = nominalFps if nominalFps and nominalFps > 0 else max(1.0, fpsEma)
-            videoWriter = cv2.VideoWriter(outputPath, fourcc, videoFps, (actualWidth, actualHeight))
-            isRecording = videoWriter.isOpened()
-            if isRecording:
-                print(f"[INFO] Recording started --> {outputPath}")
-            else:
-                print(f"[ERROR] Failed to start recording --> {outputPath}")
-            pendingRecordPath = None
-
-        # Write current frame to video if recording
-        if isRecording and videoWriter is not None and videoWriter.isOpened():
-            videoWriter.write(frame)
+            putOverlay(view, "Scale: set --mpp or --hfov + altitude", y=80)
+
+        # --burnOverlays photos are taken here, with the overlays but without the recording status
+        if photoPending and args.burnOverlays:
+            capturePhoto(frame)
+            photoPending = False
+
+        # Recording status - shown on the preview only (the recorded copy is always taken first)
+        if recorder is not None:
+            if args.burnOverlays:
+                recorder.submit(frame)
+            if recorder.error:
+                putOverlay(view, f"[ERROR] Recording: {recorder.error}", y=100)
+            elif recorder.dropped:
+                putOverlay(view, f"REC - {recorder.dropped} frames dropped (encoder too slow)", y=100)
 
         # ---- Show the frame and handle hotkeys ----
-        cv2.imshow(windowName, frame)
-        key = cv2.waitKey(1) & 0xFF
+        if downscale > 1 and not drawOnPreview:
+            previewBuffer = resizeImage(frame, previewSize, dst=previewBuffer, interpolation=cv2.INTER_AREA)
+            view = previewBuffer
+        showFrame(windowName, view)
+        if pollKey and frameCount % KEY_PUMP_EVERY:
+            key = pollKey() & 0xFF
+        else:
+            key = waitKey(1) & 0xFF
 
         if key == ord("q"):
             break
 
         elif key == ord("c"):
-            # ============================================================
-            # CAPTURE PHOTO - save PNG + JSON sidecar
-            # ============================================================
-            timestamp = nowUtcIso()
-            baseName = f"IMG_{timestamp}_{actualWidth}x{actualHeight}"
-            imagePath = os.path.join(photosDir, baseName + ".png")
-            cv2.imwrite(imagePath, frame)
-            metadata = {
-                "timestampUtc": timestamp,
-                "cameraIndex": args.index,
-                "frameWidth": actualWidth,
-                "frameHeight": actualHeight,
-                "requestedFps": args.fps,
-                "measuredFps": round(fpsEma, 2),
-                "exposure": cameraCapture.get(cv2.CAP_PROP_EXPOSURE),
-                "gain": cameraCapture.get(cv2.CAP_PROP_GAIN),
-                "codec": args.codec,
-                "software": "Camera_System.py",
-            }
-            if gnss and not getattr(gnss, "error", None):
-                if gnss.latest.get("lat") is not None and gnss.latest.get("lon") is not None:
-                    metadata["gnss"] = {
-                        "lat": gnss.latest.get("lat"),
-                        "lon": gnss.latest.get("lon"),
-                        "altMslM": gnss.latest.get("alt"),
-                    }
-                    if gnss.latest.get("hdop") is not None:
-                        metadata["gnss"]["hdop"] = gnss.latest.get("hdop")
-            if args.scale:
-                altM = args.alt if args.alt is not None else (gnss.latest.get("alt") if gnss else None)
-                mpp2 = estimateMpp(actualWidth, altM, args.hfov, args.mpp)
-                if mpp2:
-                    metadata["scale"] = {
-                        "metersPerPixel": mpp2,
-                        "altitudeM": altM,
-                        "hfovDeg": args.hfov,
-                    }
-            sidecarMetadata(imagePath, metadata)
-            print(f"[INFO] Saved still --> {imagePath}")
+            photoPending = True  # Saved from the next frame, at the same point a recording takes it
 
         elif key == ord("r"):
             # ============================================================
             # TOGGLE VIDEO RECORDING
             # ============================================================
-            if isRecording and videoWriter is not None:
-                videoWriter.release()
-                isRecording = False
+            if recorder is not None:
+                recorder.stop()
+                if recorder.dropped:
+                    print(f"[WARN] Recording dropped {recorder.dropped} frames")
+                recorder = None
                 print("[INFO] Recording stopped")
             else:
                 timestamp = nowUtcIso()
-                videoName = f"VID_{timestamp}_{actualWidth}x{actualHeight}.avi"
+                videoExt = ".avi" if args.encoder == "opencv" else ".mp4"
+                videoName = f"VID_{timestamp}_{actualWidth}x{actualHeight}{videoExt}"
                 pendingRecordPath = os.path.join(videosDir, videoName)
 
         # Check if the user closed the preview window with the X button
-        if cv2.getWindowProperty(windowName, cv2.WND_PROP_VISIBLE) < 1:
+        if windowProperty(windowName, windowVisible) < 1:
             break
 
     # ============================================================
     # CLEANUP - Release camera, close windows, stop GNSS
     # ============================================================
-    if videoWriter is not None and videoWriter.isOpened():
-        videoWriter.release()
+    if recorder is not None:
+        recorder.stop()
+    fileSaver.stop()
     cameraCapture.release()
     cv2.destroyAllWindows()
     print("[INFO] Camera released and windows closed successfully.")
@@ -1145,10 +1675,26 @@ def buildParser():
     parser.add_argument("--width", type=int, default=1280, help="Requested frame width")
     parser.add_argument("--height", type=int, default=720, help="Requested frame height")
     parser.add_argument("--fps", type=float, default=30.0, help="Requested FPS; 0 to skip setting FPS")
+    parser.add_argument("--pixfmt", choices=["auto"] + list(PIXEL_FORMATS), default="auto",
+                        help="Camera pixel format: MJPG (compressed, needed for high res/FPS over USB 2.0) or YUYV; auto = MJPG at 720p and above")
     parser.add_argument("--codec", type=str, default="MJPG", help="FourCC video codec for recording")
+    parser.add_argument("--encoder", choices=["opencv"] + list(HARDWARE_ENCODERS), default="opencv",
+                        help="Video encoder: OpenCV (CPU, uses --codec) or a hardware H.264 encoder via PyAV")
+    parser.add_argument("--stillFormat", choices=["png", "jpg"], default="png",
+                        help=f"Still image format: lossless PNG or much faster JPEG (quality {JPEG_QUALITY})")
+    parser.add_argument("--pngLevel", type=int, choices=range(10), default=1, metavar="0-9",
+                        help="PNG compression level (higher = smaller files but slower to save)")
+    parser.add_argument("--cvThreads", type=int, default=2,
+                        help="Worker threads for OpenCV operations (0 = run single-threaded)")
+    parser.add_argument("--burnOverlays", action="store_true",
+                        help="Record video and save photos with the on-screen text and scale bar drawn in (default: clean)")
+    parser.add_argument("--previewDownscale", type=int, default=1, metavar="N",
+                        help="Show the preview window at 1/N of the capture resolution (recording and photos stay full size)")
     parser.add_argument("--saveDir", type=str, default="Camera_Captures", help="Directory for saved images and videos")
     parser.add_argument("--record", type=str, default=None, help="Start recording to this file path")
-    parser.add_argument("--noDshow", action="store_true", help="Do not force DirectShow backend on Windows")
+    parser.add_argument("--backend", choices=["auto"] + list(CAMERA_BACKENDS) + ["any"], default="auto",
+                        help="Windows camera backend: auto tries Media Foundation, then DirectShow; any = OpenCV's default")
+    parser.add_argument("--noDshow", action="store_true", help="Same as --backend any (kept for older scripts)")
     parser.add_argument("--exposure", type=float, default=None, help="Set exposure value if supported")
     parser.add_argument("--gain", type=float, default=None, help="Set gain value if supported")
     parser.add_argument("--gnssPort", type=str, default=None, help="Serial port for GNSS/NMEA (e.g., COM3, /dev/ttyUSB0 or 'auto')")
@@ -11,7 +11,8 @@
 # It runs on a Raspberry Pi and communicates over Ethernet to the base station computer.
 #
 # How the CLI works:
-#   1. The command menu and motor list reprint before every prompt
+#   1. The status table and command menu stay fixed at the top of the terminal;
+#      the motor rows update in place after every command
 #   2. Type a motor number (1-4) to select it and enter a speed or angle
 #   3. The program automatically calculates the correct PWM pulse width and applies it
 #   4. Setting a NEO 550 motor to 0% speed automatically turns it off
@@ -53,10 +54,33 @@
 #       - This is critical for servos, which need microsecond-accurate pulses
 #         to translate commanded angles into actual shaft positions
 #       - Requires the pigpio daemon to be running: sudo pigpiod
+#   - sys / shutil:
+#       - Write ANSI screen updates to the terminal and read the terminal size
+#   - struct:
+#       - Packs motor commands into fixed-size binary messages for the Ethernet link
+#   - re:
+#       - Matches one-line motor commands such as "2 up 50"
+#   - argparse / ctypes:
+#       - Read the optional --cpu flag and call mlockall() for real-time scheduling
+#   - dataclasses:
+#       - MotorState keeps each motor's settings and live state in one object
+#       - slots=True needs Python 3.10 or newer (Raspberry Pi OS Bookworm ships 3.11)
+#   - os / selectors:
+#       - Wait for typed commands without blocking, so running motors are still
+#         checked on while the user is typing
 #####################################################################################################################
 
+import os
+import re
+import sys
+import ctypes
+import argparse
 import time
+import selectors
+import shutil
+import struct
 import pigpio
+from dataclasses import dataclass
 
 
 
@@ -66,6 +90,16 @@ import pigpio
 #   - Each motor is connected to one GPIO pin on the Raspberry Pi
 #   - BCM = Broadcom pin numbering (the numbers printed on Pi pinout diagrams)
 #   - Change these if you wire motors to different pins
+#
+# Hardware PWM channels (why we DON'T use them):
+#   - GPIO 12 and GPIO 18 are both wired to PWM channel 0
+#   - GPIO 13 and GPIO 19 are both wired to PWM channel 1
+#   - Both channels share one PWM clock, so pi.hardware_PWM() on these pins would
+#     force the auger and chamber lid (and the platform and soil dropper) to output
+#     the SAME pulse - four independent motors can't be driven from two channels
+#   - All four motors instead use pigpio's DMA-timed pulses (set_servo_pulsewidth
+#     or the shared waveform), which run every pin from the same 20 ms frame clock
+#     and keep any GPIO usable if the wiring changes
 #####################################################################################################################
 
 AUGER_PIN = 12  # NEO 550 --> Spark MAX controller --> GPIO 12
@@ -98,6 +132,9 @@ SOIL_DROP_PIN = 19  # SG92R micro servo --> GPIO 19
 #     SERVO_MAX_US until 0° and 180° match the physical positions
 #####################################################################################################################
 
+# Frame period shared by every motor signal (50 Hz)
+PWM_PERIOD_US = 20000
+
 # Spark MAX pulse width boundaries (microseconds)
 SPARK_NEUTRAL_US = 1500  # Motor stopped
 SPARK_MAX_FWD_US = 2000  # Full speed forward
@@ -126,6 +163,25 @@ CHAMBER_LID_MAX_US = 2500  # 180° position (pigpio limit)
 SOIL_DROP_MIN_US = 500   # 0° position
 SOIL_DROP_MAX_US = 2500  # 180° position
 
+# Pulse width lookup tables (built once at startup)
+#   - Speeds are whole percentages (0-100) and angles whole degrees (0-180), so every
+#     possible pulse width is computed here once and each command is a table read
+#   - Index = speed % (Spark MAX tables) or angle ° (servo tables)
+#   - Spark MAX forward: pulseWidth = 1500 + (speed × 500) // 100 --> 1500 µs (stop) to 2000 µs (full forward)
+#   - Spark MAX reverse: pulseWidth = 1500 - (speed × 500) // 100 --> 1500 µs (stop) to 1000 µs (full reverse)
+#   - Servos:            pulseWidth = minUs + (angle × (maxUs - minUs)) // 180
+#   - Integer math only - pigpio takes whole microseconds, so there is no float to round
+SPARK_FWD_US_TABLE = tuple(SPARK_NEUTRAL_US + (s * (SPARK_MAX_FWD_US - SPARK_NEUTRAL_US)) // 100 for s in range(101))
+SPARK_REV_US_TABLE = tuple(SPARK_NEUTRAL_US - (s * (SPARK_NEUTRAL_US - SPARK_MAX_REV_US)) // 100 for s in range(101))
+CHAMBER_LID_US_TABLE = tuple(CHAMBER_LID_MIN_US + (a * (CHAMBER_LID_MAX_US - CHAMBER_LID_MIN_US)) // 180 for a in range(181))
+SOIL_DROP_US_TABLE = tuple(SOIL_DROP_MIN_US + (a * (SOIL_DROP_MAX_US - SOIL_DROP_MIN_US)) // 180 for a in range(181))
+
+# Which angle table each servo pin uses
+SERVO_US_TABLES = {
+    CHAMBER_LID_PIN: CHAMBER_LID_US_TABLE,
+    SOIL_DROP_PIN: SOIL_DROP_US_TABLE,
+}
+
 
 
 
@@ -135,257 +191,535 @@ SOIL_DROP_MAX_US = 2500  # 180° position
 #   - NEO 550 motors store speed as a percentage (0-100 %)
 #   - Servos store angle in degrees (0-180°)
 #   - Platform motor also stores its current direction ("up" or "down")
+#   - Each motor is one MotorState object in the MOTORS table, so the functions below
+#     look a motor up by number instead of branching on it
 #   - A motor is "active" once you send it a command - it stays active until you
 #     explicitly turn it off with "off <number>" or "stop"
 #####################################################################################################################
 
-# Motor 1 - Auger (forward only)
-augerActive = False
-augerSpeed = 0  # 0-100 %
-
-# Motor 2 - Platform (bidirectional)
-platformActive = False
-platformSpeed = 0  # 0-100 %
-platformDirection = "up"  # "up" (forward) or "down" (reverse)
-
-# Motor 3 - Chamber lid servo
-chamberLidActive = False
-chamberLidAngle = 0  # 0-180°
-chamberLidWaveId = -1  # Tracks the active DMA waveform ID (-1 = no wave)
-
-# Motor 4 - Soil dropper servo
-soilDropActive = False
-soilDropAngle = 0  # 0-180°
+@dataclass(slots=True)
+class MotorState:
+    """Fixed wiring details and live state for one motor."""
+    name: str
+    shortName: str
+    pin: int
+    kind: str  # Control path: "spark" (NEO 550 speed) or "servo" (angle)
+    bidirectional: bool = False  # Spark motors only: prompt for up/down
+    active: bool = False
+    speed: int = 0  # Spark motors: 0-100 %
+    direction: str = "up"  # Spark motors: "up" = forward, "down" = reverse
+    angle: int = 0  # Servos: 0-180°
+
+
+# One MotorState per motor, keyed by motor number (1-4)
+#   - Handlers fetch a motor once and then use plain attribute access (motor.speed)
+#   - slots=True stores the fields in fixed slots instead of a per-object __dict__, and
+#     turns a mistyped field name (motor.sped = 5) into an error instead of a new attribute
+MOTORS = {
+    1: MotorState("Auger Motor", "Auger", AUGER_PIN, "spark"),
+    2: MotorState("Platform Motor", "Platform", PLATFORM_PIN, "spark", bidirectional=True),
+    3: MotorState("Chamber Lid Servo", "Chamber Lid", CHAMBER_LID_PIN, "servo"),
+    4: MotorState("Soil Dropper Servo", "Soil Dropper", SOIL_DROP_PIN, "servo"),
+}
+
+# Shared DMA waveform
+#   - wavePins maps each pin currently driven by the waveform to its pulse width (µs)
+#   - Pins NOT in wavePins are driven by pi.set_servo_pulsewidth() as usual
+activeWaveId = -1  # Tracks the active DMA waveform ID (-1 = no wave)
+wavePins = {}
+
+# Kept chamber lid waveforms, keyed by the sorted (pin, pulse width) pairs they drive
+#   - Only used while the lid is on the shared waveform by itself (after a sequence or
+#     setMotors() put it there); other lid moves go through set_servo_pulsewidth()
+#   - A lid-only wave is built the first time its angle is needed and kept, so moving
+#     back to that angle is a single "send" call instead of build + create + send
+#   - pigpio has 250 wave IDs; at most LID_WAVE_CACHE_LIMIT are kept here, leaving the
+#     rest for composite waves and retired waves still waiting to be deleted
+#   - Composite waves from setMotors() are built on demand and deleted when replaced
+LID_WAVE_CACHE_LIMIT = 64
+waveCache = {}
+cachedWaveIds = set()
+retiredWaveIds = []  # Replaced on-demand waves that may still be finishing their last frame
+
+# Last pulse width sent to each pin by the servo pulse generator (0 = no pulses)
+#   - setPinPulse() skips the daemon call when a pin is asked for the width it already has
+#   - A pin missing from the dict is "unknown" and always gets written
+lastServoUs = {}
 
 
 
 
 #####################################################################################################################
-# pigpio Daemon Connection
+# pigpio Daemon Connection and Motor Signal Setup
 #   - pigpio works by connecting to a daemon (background process) that controls
 #     the GPIO pins using the Pi's DMA hardware
 #   - The daemon must be started before running this script: sudo pigpiod
 #   - pi.connected will be False if the daemon is not running
-#####################################################################################################################
-
-pi = pigpio.pi()  # Connect to the local pigpio daemon
-if not pi.connected:
-    print("[ERROR] Cannot connect to pigpio daemon. Start it with: sudo pigpiod")
-    exit(1)
-
-
-
-
-#####################################################################################################################
-# Initializing Motor Signals
+#   - initDaemonState() holds everything the daemon has to be told after connecting, so the
+#     watchdog can run it again when it reconnects to a restarted daemon
 #   - Send the "off" signal to each motor pin on startup:
 #       - Spark MAX motors get 1500 µs (neutral / stopped)
 #       - Servos get 0 µs (no signal - holds last position or relaxes)
 #   - pigpio.set_servo_pulsewidth() sends a 50 Hz PWM signal with the specified
 #     pulse width in microseconds - this is the standard servo/ESC control method
+#   - Nothing here runs on import; setupGpio() is called from the __main__ block at
+#     the bottom, so other scripts can import the pulse width tables without
+#     touching the hardware
 #####################################################################################################################
 
-pi.set_servo_pulsewidth(AUGER_PIN, SPARK_NEUTRAL_US)  # NEO 550 - start at neutral
-pi.set_servo_pulsewidth(PLATFORM_PIN, SPARK_NEUTRAL_US)  # NEO 550 - start at neutral
-pi.wave_clear()  # Clear any leftover DMA waveforms from previous runs
-pi.write(CHAMBER_LID_PIN, 0)  # Chamber lid servo - ensure pin is LOW
-pi.set_servo_pulsewidth(SOIL_DROP_PIN, 0)  # Soil dropper servo - signal off
+pi = None  # pigpio connection, opened by setupGpio()
+setServoPulsewidth = None  # pi.set_servo_pulsewidth, bound once by setupGpio()
+stopScriptId = -1  # pigpio script that stops every motor in one call (-1 = not stored)
+STOP_SCRIPT_TIMEOUT_S = 0.05  # Longest wait for the stop script to finish (it normally takes well under 1 ms)
 
+# The emergency-stop script, stored in the pigpio daemon at startup:
+#   wvhlt          stop the shared DMA waveform
+#   s <pin> <us>   Spark MAX pins to neutral, servo pins to no signal
+#   w <pin> 0      chamber lid pin LOW
+STOP_SCRIPT = (
+    f"wvhlt "
+    f"s {AUGER_PIN} {SPARK_NEUTRAL_US} s {PLATFORM_PIN} {SPARK_NEUTRAL_US} "
+    f"s {CHAMBER_LID_PIN} 0 s {SOIL_DROP_PIN} 0 "
+    f"w {CHAMBER_LID_PIN} 0"
+)
 
 
+def setupGpio():
+    """Connect to the pigpio daemon and put every motor pin in its safe startup state."""
+    global pi
 
-#####################################################################################################################
-# Helper Function - Convert Speed % to Spark MAX Pulse Width
-#
-#   Parameters:
-#       speedPct (int) - motor speed as a percentage, 0 to 100
-#       direction (str) - "forward" or "reverse"
-#
-#   Returns:
-#       int - the pulse width in microseconds to send to the Spark MAX
-#
-#   How it works:
-#       Forward: pulseWidth = 1500 + (speed / 100) × 500 --> 1500 µs (stop) to 2000 µs (full forward)
-#       Reverse: pulseWidth = 1500 - (speed / 100) × 500 --> 1500 µs (stop) to 1000 µs (full reverse)
-#####################################################################################################################
+    pi = pigpio.pi()  # Connect to the local pigpio daemon
+    if not pi.connected:
+        print("[ERROR] Cannot connect to pigpio daemon. Start it with: sudo pigpiod")
+        exit(1)
 
-def speedToPulseWidth(speedPct, direction="forward"):
-    """Convert a speed percentage and direction to a Spark MAX pulse width in µs."""
-    if direction == "forward":
-        return SPARK_NEUTRAL_US + (speedPct / 100.0) * (SPARK_MAX_FWD_US - SPARK_NEUTRAL_US)
-    else:
-        return SPARK_NEUTRAL_US - (speedPct / 100.0) * (SPARK_NEUTRAL_US - SPARK_MAX_REV_US)
+    initDaemonState()
 
 
+def initDaemonState():
+    """Put every motor pin in its safe state and load the stop script into the daemon."""
+    global setServoPulsewidth, stopScriptId
 
+    # Bind the most-called pigpio method once instead of looking it up on every write
+    setServoPulsewidth = pi.set_servo_pulsewidth
+    lastServoUs.clear()  # Nothing is known about a freshly connected daemon's pins
 
-#####################################################################################################################
-# Helper Function - Convert Angle to Servo Pulse Width
-#
-#   Parameters:
-#       angle (int)  - desired servo angle in degrees, 0 to 180
-#       minUs (int)  - pulse width in µs for 0° (from the per-servo constant)
-#       maxUs (int)  - pulse width in µs for 180° (from the per-servo constant)
-#
-#   Returns:
-#       int - the pulse width in microseconds to send to the servo
-#
-#   How it works:
-#       pulseWidth = minUs + (angle / 180) × (maxUs - minUs)
-#####################################################################################################################
+    setPinPulse(AUGER_PIN, SPARK_NEUTRAL_US)  # NEO 550 - start at neutral
+    setPinPulse(PLATFORM_PIN, SPARK_NEUTRAL_US)  # NEO 550 - start at neutral
+    pi.wave_clear()  # Clear any leftover DMA waveforms from previous runs
+    writePinLow(CHAMBER_LID_PIN)  # Chamber lid servo - ensure pin is LOW
+    setPinPulse(SOIL_DROP_PIN, 0)  # Soil dropper servo - signal off
 
-def angleToPulseWidth(angle, minUs, maxUs):
-    """Convert an angle in degrees to a servo pulse width in µs."""
-    angle = max(0, min(180, angle))  # Clamp the angle to the valid range
-    return minUs + (angle / 180.0) * (maxUs - minUs)
+    # wave_clear() deleted every kept wave along with the leftovers
+    waveCache.clear()
+    cachedWaveIds.clear()
+
+    # Store the stop-all script so an emergency stop is a single daemon call
+    try:
+        stopScriptId = pi.store_script(STOP_SCRIPT.encode())
+        while pi.script_status(stopScriptId)[0] == pigpio.PI_SCRIPT_INITING:
+            time.sleep(0.001)
+    except pigpio.error as e:
+        stopScriptId = -1
+        print(f"[WARN] Could not store stop script ({e}); stopping motors one pin at a time.")
 
 
 
 
 #####################################################################################################################
 # Motor Control Functions
+#   - setPinPulse(): sends a pulse width to one pin (waveform or servo pulses, whichever owns it)
+#       - the single place every motor pulse write goes through
 #   - setSparkMotor(): sends the correct pulse width to a Spark MAX (NEO 550)
 #   - setServoAngle(): sends the correct pulse width to a hobby servo
-#   - stopAllMotors(): immediately stops every motor and resets all state
+#   - setMotors(): drives several motors from ONE waveform so their pulses start together
+#   - stopAllMotors(): immediately stops every motor (one pigpio script call) and resets all state
 #   - stopSingleMotor(): stops one motor by number and resets its state
 #####################################################################################################################
 
-def setSparkMotor(pin, speedPct, direction="forward"):
-    """Send a speed command to a NEO 550 motor via its Spark MAX controller."""
-    pulseWidth = speedToPulseWidth(speedPct, direction)
-    pi.set_servo_pulsewidth(pin, pulseWidth)
-
-
-def setChamberLidPulse(pulseWidthUs):
-    """Send a servo pulse to the chamber lid using DMA waveforms.
-
-    Uses pigpio's wave API which generates DMA-timed pulses identical in
-    quality to set_servo_pulsewidth, but with no 500-2500 µs restriction.
-    This avoids the jitter caused by hardware_PWM (which uses a different
-    clock peripheral not designed for servo control).
-
-    Set pulseWidthUs=0 to stop the signal."""
-    global chamberLidWaveId
-
-    if pulseWidthUs <= 0:
-        # Stop any active wave transmission
+def buildFramePulses(pulseWidths):
+    """Build one 50 Hz frame of pigpio pulses for every pin in pulseWidths.
+
+    All pins go HIGH on the same edge at the start of the frame, then each pin
+    drops LOW when its own pulse width has elapsed."""
+    onMask = 0
+    for pin in pulseWidths:
+        onMask |= 1 << pin
+
+    pulses = []
+    offMask = 0
+    elapsedUs = 0
+    for widthUs in sorted(set(pulseWidths.values())):
+        pulses.append(pigpio.pulse(onMask, offMask, widthUs - elapsedUs))
+        onMask = 0
+        offMask = 0
+        for pin, pinWidthUs in pulseWidths.items():
+            if pinWidthUs == widthUs:
+                offMask |= 1 << pin
+        elapsedUs = widthUs
+
+    # Every pin is LOW for the remainder of the 20 ms frame
+    pulses.append(pigpio.pulse(0, offMask, PWM_PERIOD_US - elapsedUs))
+    return pulses
+
+
+def sendWave():
+    """Send the shared DMA waveform for the current wavePins and start repeating it.
+
+    Uses a kept lid wave when one exists. Stops the waveform entirely when no
+    pins are left on it."""
+    global activeWaveId
+
+    if not wavePins:
+        # Stop any active wave transmission - nothing is transmitting afterwards,
+        # so every replaced wave can be deleted right away
         pi.wave_tx_stop()
-        if chamberLidWaveId >= 0:
-            pi.wave_delete(chamberLidWaveId)
-            chamberLidWaveId = -1
-        # Ensure pin is LOW after stopping
-        pi.write(CHAMBER_LID_PIN, 0)
+        if activeWaveId >= 0 and activeWaveId not in cachedWaveIds:
+            retiredWaveIds.append(activeWaveId)
+        activeWaveId = -1
+        for waveId in retiredWaveIds:
+            pi.wave_delete(waveId)
+        retiredWaveIds.clear()
         return
 
-    # Build a repeating 50 Hz waveform: HIGH for pulseWidth, LOW for remainder
-    pulseWidthUs = int(pulseWidthUs)
-    offTimeUs = 20000 - pulseWidthUs  # 50 Hz period = 20000 µs
+    # Free replaced waves that have finished by now (usually all of them)
+    deleteRetiredWaves()
+
+    key = tuple(sorted(wavePins.items()))
+    waveId = waveCache.get(key)
+    if waveId is None:
+        # No kept wave for this combination - build one
+        pi.wave_add_generic(buildFramePulses(wavePins))
+        waveId = pi.wave_create()
+        # Keep lid-only waves for the next move to the same angle, up to the ID budget
+        if len(key) == 1 and key[0][0] == CHAMBER_LID_PIN and len(waveCache) < LID_WAVE_CACHE_LIMIT:
+            waveCache[key] = waveId
+            cachedWaveIds.add(waveId)
+
+    # REPEAT_SYNC switches over at the end of the current frame, so there is no gap
+    # or glitch; the old wave keeps running until then
+    pi.wave_send_using_mode(waveId, pigpio.WAVE_MODE_REPEAT_SYNC)
+
+    # The old wave can't be deleted while it finishes its frame - retire it and
+    # delete it on a later call instead of sleeping here (kept lid waves are not deleted)
+    oldWaveId = activeWaveId
+    activeWaveId = waveId
+    if oldWaveId >= 0 and oldWaveId != waveId and oldWaveId not in cachedWaveIds:
+        retiredWaveIds.append(oldWaveId)
+
+
+def deleteRetiredWaves():
+    """Delete every retired wave that the DMA engine is no longer transmitting."""
+    if not retiredWaveIds:
+        return
+    transmittingId = pi.wave_tx_at()
+    for waveId in list(retiredWaveIds):
+        if waveId != transmittingId:
+            pi.wave_delete(waveId)
+            retiredWaveIds.remove(waveId)
 
-    # Clear any previously added waveform data before building the new one
-    pi.wave_clear()
 
-    pi.wave_add_generic([
-        pigpio.pulse(1 << CHAMBER_LID_PIN, 0, pulseWidthUs),   # Pin HIGH
-        pigpio.pulse(0, 1 << CHAMBER_LID_PIN, offTimeUs)       # Pin LOW
-    ])
+def setPinPulse(pin, pulseWidthUs):
+    """Send a pulse width to one pin, through the shared waveform if the pin is on it.
 
-    newWaveId = pi.wave_create()
-    pi.wave_send_repeat(newWaveId)
+    Every motor pulse write goes through here, so the choice of pulse generator
+    lives in one place."""
+    if pin in wavePins:
+        if pulseWidthUs > 0:
+            wavePins[pin] = pulseWidthUs
+        else:
+            del wavePins[pin]
+            writePinLow(pin)
+        sendWave()
+    elif lastServoUs.get(pin) != pulseWidthUs:
+        # Re-sending the same width would only restart the pin's pulse train
+        setServoPulsewidth(pin, pulseWidthUs)
+        lastServoUs[pin] = pulseWidthUs
 
-    # Delete old wave after new one has started
-    if chamberLidWaveId >= 0:
-        time.sleep(0.002)  # Brief pause to let new wave take over
-        pi.wave_delete(chamberLidWaveId)
 
-    chamberLidWaveId = newWaveId
+def writePinLow(pin):
+    """Drive a pin LOW, which also ends any servo pulses on it."""
+    pi.write(pin, 0)
+    lastServoUs[pin] = 0
 
 
-def setServoAngle(pin, angle, minUs, maxUs):
+def setSparkMotor(pin, speedPct, direction="forward"):
+    """Send a speed command to a NEO 550 motor via its Spark MAX controller."""
+    table = SPARK_FWD_US_TABLE if direction == "forward" else SPARK_REV_US_TABLE
+    setPinPulse(pin, table[speedPct])
+
+
+def setServoAngle(pin, angle):
     """Move a servo motor to the specified angle (0-180°).
 
-    Chamber lid (GPIO 18): wave API ONLY (or off at 0°)
-    Soil dropper (GPIO 19): set_servo_pulsewidth ONLY"""
-    angle = max(0, min(180, angle))
-    pulseWidth = angleToPulseWidth(angle, minUs, maxUs)
+    Both servos go through setPinPulse(): the shared DMA waveform while the pin is on
+    it (after a sequence or setMotors()), set_servo_pulsewidth otherwise. At 0° the
+    chamber lid (GPIO 18) gets no signal.
+
+    The angle is not clamped here - every caller has already checked it is 0-180."""
+    pulseWidth = SERVO_US_TABLES[pin][angle]
 
     if pin == CHAMBER_LID_PIN:
         # 0° -> turn signal off
         if angle <= 0:
-            pi.set_servo_pulsewidth(CHAMBER_LID_PIN, 0)
+            setPinPulse(CHAMBER_LID_PIN, 0)
             return
-        # All nonzero angles -> set_servo_pulsewidth (for debug)
-        pi.set_servo_pulsewidth(CHAMBER_LID_PIN, int(pulseWidth))
+        # Nonzero angles -> setPinPulse(): the shared waveform if the lid is on it,
+        # set_servo_pulsewidth otherwise
+        setPinPulse(CHAMBER_LID_PIN, pulseWidth)
     else:
-        pi.set_servo_pulsewidth(pin, int(pulseWidth))
+        setPinPulse(pin, pulseWidth)
 
 
-def stopAllMotors():
-    """Stop every motor and reset all state variables to defaults."""
-    global augerActive, augerSpeed
-    global platformActive, platformSpeed, platformDirection
-    global chamberLidActive, chamberLidAngle
-    global soilDropActive, soilDropAngle
+#####################################################################################################################
+# Synchronized Multi-Motor Move
+#
+#   Parameters:
+#       auger (int)    - pulse width in µs for the auger Spark MAX, or None to leave it alone
+#       platform (int) - pulse width in µs for the platform Spark MAX, or None to leave it alone
+#       lid (int)      - pulse width in µs for the chamber lid servo, or None to leave it alone
+#       dropper (int)  - pulse width in µs for the soil dropper servo, or None to leave it alone
+#
+#   Returns:
+#       None - moves the given pins onto the shared DMA waveform
+#
+#   How it works:
+#       1. Each requested pin stops receiving set_servo_pulsewidth() pulses
+#       2. One 20 ms waveform is built where every requested pin rises on the same edge
+#       3. The waveform repeats until the pins are stopped, so coordinated steps like
+#          "platform down + auger on + lid open" start within a couple of µs of each other
+#       4. A pulse width of 0 takes that pin off the waveform and drives it LOW
+#       - Read the pulse widths from the SPARK_*_US_TABLE / *_US_TABLE lookup tables
+#####################################################################################################################
 
-    # Send neutral signal to Spark MAX controllers (stops the NEO 550s)
-    pi.set_servo_pulsewidth(AUGER_PIN, SPARK_NEUTRAL_US)
-    pi.set_servo_pulsewidth(PLATFORM_PIN, SPARK_NEUTRAL_US)
+def setMotors(auger=None, platform=None, lid=None, dropper=None):
+    """Drive several motors from one composite waveform so their pulses are edge-aligned."""
+    requested = {
+        AUGER_PIN: auger,
+        PLATFORM_PIN: platform,
+        CHAMBER_LID_PIN: lid,
+        SOIL_DROP_PIN: dropper,
+    }
+
+    for pin, pulseWidthUs in requested.items():
+        if pulseWidthUs is None:
+            continue
+        if pulseWidthUs > 0:
+            # Hand the pin over from the servo pulse generator to the waveform
+            if pin not in wavePins:
+                setPinPulse(pin, 0)
+            wavePins[pin] = int(pulseWidthUs)
+        else:
+            wavePins.pop(pin, None)
+            writePinLow(pin)
 
-    # Turn off servo PWM signals (servos will hold last position or relax)
-    # Chamber lid: stop the DMA waveform
-    setChamberLidPulse(0)
-    # Soil dropper: standard servo control
-    pi.set_servo_pulsewidth(SOIL_DROP_PIN, 0)
+    # One build + one transmit for every requested motor
+    sendWave()
 
-    # Reset state
-    augerActive = False
-    augerSpeed = 0
 
-    platformActive = False
-    platformSpeed = 0
-    platformDirection = "up"
+# Pulse width that turns each kind of motor off: neutral for a Spark MAX, no signal for a servo
+OFF_PULSE_US = {
+    "spark": SPARK_NEUTRAL_US,
+    "servo": 0,
+}
 
-    chamberLidActive = False
-    chamberLidAngle = 0
 
-    soilDropActive = False
-    soilDropAngle = 0
+def resetMotorState(motor):
+    """Mark a motor as stopped and put its speed/angle/direction back to defaults."""
+    motor.active = False
+    if motor.kind == "spark":
+        motor.speed = 0
+        motor.direction = "up"
+    else:
+        motor.angle = 0
+
+
+def runStopScript():
+    """Run the stored stop script and wait for the daemon to finish it.
+
+    run_script() only starts the script, so without waiting, "stopped" could be
+    reported - or the next command sent, or the script deleted at shutdown - while
+    it is still writing the pins. Returns False if it is still running at the deadline."""
+    pi.run_script(stopScriptId)
+    deadline = time.monotonic() + STOP_SCRIPT_TIMEOUT_S
+    while pi.script_status(stopScriptId)[0] == pigpio.PI_SCRIPT_RUNNING:
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+def stopAllMotors():
+    """Stop every motor and reset all state variables to defaults."""
+    if stopScriptId >= 0:
+        # One daemon call: the stored script halts the waveform and writes all four pins
+        try:
+            finished = runStopScript()
+        except pigpio.error:
+            finished = False
+        if finished:
+            wavePins.clear()
+            lastServoUs.clear()  # The script wrote the pins behind setPinPulse()'s back
+            # activeWaveId stays set: the halted wave is retired by the next sendWave()
+            for motor in MOTORS.values():
+                resetMotorState(motor)
+            return
+        print("[WARN] Stop script did not finish; stopping motors one pin at a time.")
+
+    # Fallback when the script couldn't be stored: one call per pin
+    # Stop the shared DMA waveform first so it can't fight the signals below
+    wavePinsBeforeStop = list(wavePins)
+    wavePins.clear()
+    sendWave()
+
+    # The halted wave leaves its pins at whatever level they were driving - force them LOW
+    # (setPinPulse() below would skip a servo pin whose last known pulse width is already 0)
+    for pin in wavePinsBeforeStop:
+        writePinLow(pin)
+
+    # Spark MAX controllers get neutral (stops the NEO 550s); servos get no signal
+    # (they hold last position or relax)
+    for motor in MOTORS.values():
+        setPinPulse(motor.pin, OFF_PULSE_US[motor.kind])
+        resetMotorState(motor)
+
+    # Chamber lid: ensure pin is LOW
+    writePinLow(CHAMBER_LID_PIN)
 
 
 def stopSingleMotor(motorNum):
     """Stop one motor by its number (1-4) and reset its state."""
-    global augerActive, augerSpeed
-    global platformActive, platformSpeed, platformDirection
-    global chamberLidActive, chamberLidAngle
-    global soilDropActive, soilDropAngle
-
-    if motorNum == 1:
-        pi.set_servo_pulsewidth(AUGER_PIN, SPARK_NEUTRAL_US)
-        augerActive = False
-        augerSpeed = 0
-        print("[INFO] Auger Motor stopped.")
-
-    elif motorNum == 2:
-        pi.set_servo_pulsewidth(PLATFORM_PIN, SPARK_NEUTRAL_US)
-        platformActive = False
-        platformSpeed = 0
-        platformDirection = "up"
-        print("[INFO] Platform Motor stopped.")
-
-    elif motorNum == 3:
-        # Stop the DMA waveform driving the chamber lid servo
-        setChamberLidPulse(0)
-        chamberLidActive = False
-        chamberLidAngle = 0
-        print("[INFO] Chamber Lid Servo stopped.")
-
-    elif motorNum == 4:
-        pi.set_servo_pulsewidth(SOIL_DROP_PIN, 0)
-        soilDropActive = False
-        soilDropAngle = 0
-        print("[INFO] Soil Dropper Servo stopped.")
-
-    else:
+    motor = MOTORS.get(motorNum)
+    if motor is None:
         print("[WARN] Invalid motor number. Use 1-4.")
+        return
+
+    setPinPulse(motor.pin, OFF_PULSE_US[motor.kind])
+    resetMotorState(motor)
+    stoppedLine = f"[INFO] {motor.name} stopped."
+    print(stoppedLine)
+
+
+
+
+#####################################################################################################################
+# Network Command Encoding (Ethernet link to the base station)
+#   - Every motor command is one fixed 8-byte little-endian message:
+#       byte 0    motor number (1-4, 0 = all motors)
+#       byte 1    value (speed 0-100 % or angle 0-180°)
+#       byte 2    direction (0 = forward / up, 1 = reverse / down)
+#       byte 3    flags (CMD_FLAG_STOP = emergency stop)
+#       bytes 4-7 sender timestamp in ms (wraps every ~49 days)
+#   - Messages are packed into ONE reusable buffer, so flooding emergency stops
+#     from the base station never allocates new objects (no garbage collector pauses)
+#   - The returned buffer is overwritten by the next call - send it before encoding again
+#####################################################################################################################
+
+CMD_STRUCT = struct.Struct("<BBBBI")
+CMD_FLAG_STOP = 0x01
+
+cmdBuffer = bytearray(CMD_STRUCT.size)
+
+
+def encodeMotorCommand(motorNum, value, direction=0, flags=0):
+    """Pack a motor command into the shared command buffer and return it."""
+    timestampMs = (time.monotonic_ns() // 1_000_000) & 0xFFFFFFFF
+    CMD_STRUCT.pack_into(cmdBuffer, 0, motorNum, value, direction, flags, timestampMs)
+    return cmdBuffer
+
+
+def decodeMotorCommand(buffer, offset=0):
+    """Unpack (motorNum, value, direction, flags, timestampMs) from a received message."""
+    return CMD_STRUCT.unpack_from(buffer, offset)
+
+
+
+
+#####################################################################################################################
+# Terminal Screen Layout (ANSI cursor addressing)
+#   - When the CLI runs in a real terminal, the status table and menu are drawn ONCE
+#     at the top of the screen and stay there
+#   - Only the four motor status rows are rewritten in place after each command, so
+#     the screen doesn't scroll and the motor rows never move
+#   - Prompts and [INFO]/[WARN] messages scroll in the region BELOW the menu
+#   - When output is piped or the terminal is too short, the CLI falls back to plain
+#     printing (status table after each command, menu before each prompt)
+#
+#   Screen rows:
+#       1-3    status header
+#       4-7    motor status rows (updated in place)
+#       8      status footer
+#       9-25   command menu and motor list
+#       26+    scrolling prompt / message region
+#####################################################################################################################
+
+STATUS_FIRST_ROW = 4  # Screen row of motor [1]; motors [2]-[4] follow directly below
+
+STATUS_HEADER_LINES = [
+    "=" * 62,
+    "  LUSI Science Module - Motor Status",
+    "=" * 62,
+]
+
+MENU_LINES = [
+    "-" * 62,
+    "  Commands:",
+    "    1-4          Select a motor (see list below)",
+    "    2 up 50      Set a motor in one line (motor [up/down] speed/angle)",
+    "    off          Turn off a single motor",
+    "    stop / x     Stop ALL motors immediately",
+    "    status / s   Show motor status",
+    "    help / h     Show this menu",
+    "    q            Quit program",
+    "    3,90;4,45    Move several servos together (motor,angle pairs)",
+    "-" * 62,
+    "  Motors:",
+    "    [1] Auger Motor (NEO 550)    - speed 0-100%, forward only",
+    "    [2] Platform Motor (NEO 550) - speed 0-100%, up or down",
+    "    [3] Chamber Lid (SM-S2309S)  - angle 0-180°",
+    "    [4] Soil Dropper (SG92R)     - angle 0-180°",
+    "",
+]
+
+# The menu never changes, so it is joined into one string once and written in one call
+MENU_TEXT = "\n".join(MENU_LINES) + "\n"
+
+# Prompts scroll below the status rows, the status footer, and the menu
+SCROLL_TOP_ROW = STATUS_FIRST_ROW + 4 + 1 + len(MENU_LINES)
+SCREEN_MIN_ROWS = SCROLL_TOP_ROW + 6  # Smaller terminals use plain printing
+
+fixedScreen = False  # True once the fixed ANSI layout has been drawn
+
+
+def useFixedScreen():
+    """Return True if stdout is a terminal tall enough for the fixed layout."""
+    if not sys.stdout.isatty():
+        return False
+    return shutil.get_terminal_size().lines >= SCREEN_MIN_ROWS
+
+
+def drawScreen():
+    """Clear the terminal, draw the status table and menu, and set the scroll region."""
+    rows = shutil.get_terminal_size().lines
+    screen = ["\x1b[2J\x1b[H"]
+    screen.extend(line + "\n" for line in STATUS_HEADER_LINES)
+    values = statusValues()
+    for index, template in enumerate(STATUS_LINE_TEMPLATES):
+        drawnStatusLines[index] = template.format_map(values)
+        screen.append(drawnStatusLines[index] + "\n")
+    screen.append("=" * 62 + "\n")
+    screen.append(MENU_TEXT)
+    # Lock rows above SCROLL_TOP_ROW in place and park the cursor in the prompt region
+    screen.append(f"\x1b[{SCROLL_TOP_ROW};{rows}r\x1b[{SCROLL_TOP_ROW};1H")
+    sys.stdout.write("".join(screen))
+    sys.stdout.flush()
+
+
+def restoreScreen():
+    """Release the scroll region and move the cursor to the bottom of the terminal."""
+    rows = shutil.get_terminal_size().lines
+    sys.stdout.write(f"\x1b[r\x1b[{rows};1H\n")
+    sys.stdout.flush()
 
 
 
@@ -395,38 +729,62 @@ def stopSingleMotor(motorNum):
 #   - Prints the current state of all four motors in a readable table
 #   - Shows whether each motor is ON or OFF, its current speed/angle, and direction
 #   - Called automatically after every command so you always see the latest state
+#   - In the fixed layout only the four motor rows are rewritten, in place
 #####################################################################################################################
 
-def printStatus():
-    """Print the current state of all four motors."""
-    print("")
-    print("=" * 62)
-    print("  LUSI Science Module - Motor Status")
-    print("=" * 62)
-
-    # Motor 1 - Auger
-    augerStatus = "ON" if augerActive else "OFF"
-    augerLine = f"  [1] Auger Motor (NEO 550)    | {augerStatus} | Speed: {augerSpeed}%"
-    print(augerLine)
-
-    # Motor 2 - Platform
-    platformStatus = "ON" if platformActive else "OFF"
-    dirStr = platformDirection.upper() if platformActive else "--"
-    platformLine = f"  [2] Platform Motor (NEO 550) | {platformStatus} | Speed: {platformSpeed}% | Dir: {dirStr}"
-    print(platformLine)
+# The layout never changes - only the values do - so each view is one template,
+# filled with format_map() and written in a single call
+STATUS_LINE_TEMPLATES = [
+    "  [1] Auger Motor (NEO 550)    | {augerStatus} | Speed: {augerSpeed}%",
+    "  [2] Platform Motor (NEO 550) | {platformStatus} | Speed: {platformSpeed}% | Dir: {platformDir}",
+    "  [3] Chamber Lid (SM-S2309S)  | {chamberStatus} | Angle: {chamberAngle}°",
+    "  [4] Soil Dropper (SG92R)     | {dropperStatus} | Angle: {dropperAngle}°",
+]
+
+# Plain mode: blank line, header, motor rows, footer, blank line
+STATUS_TABLE_TEMPLATE = (
+    "\n" + "\n".join(STATUS_HEADER_LINES + STATUS_LINE_TEMPLATES) + "\n" + "=" * 62 + "\n\n"
+)
+
+# Fixed layout: the motor rows currently on screen, so printStatus() rewrites only rows that changed
+drawnStatusLines = [""] * len(STATUS_LINE_TEMPLATES)
+
+
+def statusValues():
+    """Return the values that fill the status templates."""
+    auger, platform, chamber, dropper = MOTORS[1], MOTORS[2], MOTORS[3], MOTORS[4]
+    return {
+        "augerStatus": "ON" if auger.active else "OFF",
+        "augerSpeed": auger.speed,
+        "platformStatus": "ON" if platform.active else "OFF",
+        "platformSpeed": platform.speed,
+        "platformDir": platform.direction.upper() if platform.active else "--",
+        "chamberStatus": "ON" if chamber.active else "OFF",
+        "chamberAngle": chamber.angle,
+        "dropperStatus": "ON" if dropper.active else "OFF",
+        "dropperAngle": dropper.angle,
+    }
 
-    # Motor 3 - Chamber Lid
-    chamberStatus = "ON" if chamberLidActive else "OFF"
-    chamberLine = f"  [3] Chamber Lid (SM-S2309S)  | {chamberStatus} | Angle: {chamberLidAngle}°"
-    print(chamberLine)
 
-    # Motor 4 - Soil Dropper
-    dropperStatus = "ON" if soilDropActive else "OFF"
-    dropperLine = f"  [4] Soil Dropper (SG92R)     | {dropperStatus} | Angle: {soilDropAngle}°"
-    print(dropperLine)
+def printStatus():
+    """Print the current state of all four motors."""
+    values = statusValues()
+    if not fixedScreen:
+        sys.stdout.write(STATUS_TABLE_TEMPLATE.format_map(values))
+        sys.stdout.flush()
+        return
 
-    print("=" * 62)
-    print("")
+    # Fixed layout: overwrite only the motor rows whose text changed (\x1b[K clears leftovers),
+    # between saving and restoring the cursor
+    updates = []
+    for index, template in enumerate(STATUS_LINE_TEMPLATES):
+        line = template.format_map(values)
+        if line != drawnStatusLines[index]:
+            drawnStatusLines[index] = line
+            updates.append(f"\x1b[{STATUS_FIRST_ROW + index};1H{line}\x1b[K")
+    if updates:
+        sys.stdout.write("\x1b7" + "".join(updates) + "\x1b8")
+        sys.stdout.flush()
 
 
 
@@ -434,29 +792,197 @@ def printStatus():
 #####################################################################################################################
 # Command and Motor List Display
 #   - Prints the available commands AND the numbered motor list together
-#   - Reprinted every time the prompt comes back so the user always sees
-#     what they can type
+#   - In plain mode it is reprinted every time the prompt comes back so the user
+#     always sees what they can type (the fixed layout keeps it on screen instead)
 #   - The user types a motor number (1-4) directly to control it, or
 #     types a utility command like stop, off, status, help, or q
 #####################################################################################################################
 
 def printMenu():
     """Print the commands and motor list."""
-    print("-" * 62)
-    print("  Commands:")
-    print("    1-4          Select a motor (see list below)")
-    print("    off          Turn off a single motor")
-    print("    stop / x     Stop ALL motors immediately")
-    print("    status / s   Show motor status")
-    print("    help / h     Show this menu")
-    print("    q            Quit program")
-    print("-" * 62)
-    print("  Motors:")
-    print("    [1] Auger Motor (NEO 550)    - speed 0-100%, forward only")
-    print("    [2] Platform Motor (NEO 550) - speed 0-100%, up or down")
-    print("    [3] Chamber Lid (SM-S2309S)  - angle 0-180°")
-    print("    [4] Soil Dropper (SG92R)     - angle 0-180°")
-    print("")
+    sys.stdout.write(MENU_TEXT)
+
+
+
+
+#####################################################################################################################
+# Command Input - Non-Blocking Line Reader with a Watchdog Tick
+#
+#   How it works:
+#       1. Every prompt (the main ">>" prompt and the speed/angle/direction prompts)
+#          goes through readLine() instead of input()
+#       2. readLine() waits on stdin with a selector:
+#           - for at most INPUT_TICK_S seconds while any motor is running
+#           - until the next once-a-second daemon ping while every motor is off, so an
+#             idle CLI sleeps in the kernel instead of waking 20 times a second
+#       3. If a line arrived, it is returned just like input() would return it
+#       4. If nothing arrived, watchdogTick() runs and the wait starts again, so the
+#          program keeps checking on running motors while the user is still typing
+#       5. The watchdog pings the pigpio daemon on every tick while any motor is active,
+#          and once a second otherwise
+#       6. If the daemon stops answering, every motor is marked off (a stopped daemon
+#          stops generating pulses) and the CLI reconnects:
+#           - a restarted daemon gets the same setup as at startup (safe pin states,
+#             stop script) and the CLI carries on
+#           - if no daemon answers, the CLI quits (EOFError) instead of showing a
+#             status that no longer matches the hardware
+#
+#   Notes:
+#       - stdin is read with os.read() on its file descriptor and split into lines
+#         here, so no text is ever left sitting unseen inside sys.stdin's own buffer
+#       - inputPending() checks without waiting whether more input is already queued
+#         (pasted or piped lines), so the main loop can hold off redrawing until then
+#           - a pipe at end of input also looks readable, so it reads what is ready
+#             and counts end of input as "nothing pending"; readLine() then reports it
+#       - CTRL+C still raises KeyboardInterrupt and CTRL+D / end of a piped file
+#         still raises EOFError, so the prompt handlers work exactly as with input()
+#
+#   Parameters:
+#       prompt (str) - text shown before the cursor
+#
+#   Returns:
+#       str - the line the user typed, without the trailing newline
+#####################################################################################################################
+
+INPUT_TICK_S = 0.05  # Longest wait for a keystroke before the watchdog runs again
+WATCHDOG_IDLE_S = 1.0  # Ping interval while every motor is off (every tick while one runs)
+
+# Errors the pigpio client raises when the daemon has gone away
+#   - pigpio.error: the daemon answered with an error code
+#   - OSError: the socket was closed or reset
+#   - struct.error: the daemon closed the socket mid-reply
+DAEMON_ERRORS = (pigpio.error, OSError, struct.error)
+
+inputSelector = None  # Selector watching stdin, created by the first readLine()
+inputBuffer = b""  # Bytes read from stdin that don't make a full line yet
+inputAtEof = False  # True once a read hit end of input that readLine() hasn't reported yet
+daemonLost = False  # True once the pigpio daemon stopped answering and could not be reconnected
+lastPingTime = 0.0  # time.monotonic() of the watchdog's last ping
+
+
+def openInputSelector():
+    """Create the selector that waits on stdin."""
+    global inputSelector
+
+    try:
+        inputSelector = selectors.DefaultSelector()
+        inputSelector.register(sys.stdin.fileno(), selectors.EVENT_READ)
+    except PermissionError:
+        # epoll refuses regular files (stdin redirected from a command file) - select() accepts them
+        inputSelector = selectors.SelectSelector()
+        inputSelector.register(sys.stdin.fileno(), selectors.EVENT_READ)
+
+
+def watchdogWait():
+    """Return how long readLine() may sleep on stdin before the watchdog is due again."""
+    if any(motor.active for motor in MOTORS.values()):
+        return INPUT_TICK_S
+    # Everything is off - sleep until the next idle ping instead of waking every tick
+    return max(0.0, lastPingTime + WATCHDOG_IDLE_S - time.monotonic())
+
+
+def watchdogTick():
+    """Check that the pigpio daemon still answers, and reconnect if it was restarted."""
+    global daemonLost, lastPingTime
+
+    # Ping on every tick while a motor runs, otherwise once per WATCHDOG_IDLE_S
+    now = time.monotonic()
+    if now - lastPingTime < WATCHDOG_IDLE_S and not any(motor.active for motor in MOTORS.values()):
+        return
+    lastPingTime = now
+
+    try:
+        pi.wave_tx_busy()  # Cheapest round-trip to the daemon
+        return
+    except DAEMON_ERRORS:
+        pass
+
+    # The daemon is gone - whatever it was generating has stopped with it
+    for motor in MOTORS.values():
+        resetMotorState(motor)
+    if reconnectGpio():
+        print("\n[WARN] pigpio daemon restarted - reconnected. All motors are OFF; re-enter your commands.")
+        printStatus()
+        return
+
+    daemonLost = True
+    print("\n[ERROR] Lost contact with the pigpio daemon. Check the motors and cut power if they keep running.")
+    raise EOFError
+
+
+def reconnectGpio():
+    """Open a new connection to a restarted pigpio daemon and redo the startup setup."""
+    global pi, activeWaveId
+
+    try:
+        pi.stop()  # Close the dead socket
+    except DAEMON_ERRORS:
+        pass
+
+    newPi = pigpio.pi()
+    if not newPi.connected:
+        return False
+    pi = newPi
+
+    # A restarted daemon has none of our waves or scripts - forget the old IDs and load them again
+    wavePins.clear()
+    retiredWaveIds.clear()
+    activeWaveId = -1
+    try:
+        initDaemonState()
+    except DAEMON_ERRORS:
+        return False
+    return True
+
+
+def readInputChunk():
+    """Read whatever stdin has ready into inputBuffer, noting end of input if nothing came."""
+    global inputBuffer, inputAtEof
+
+    chunk = os.read(sys.stdin.fileno(), 4096)
+    if not chunk:
+        inputAtEof = True
+    inputBuffer += chunk
+
+
+def inputPending():
+    """Return True if more typed or pasted input is already waiting to be read."""
+    if b"\n" in inputBuffer:
+        return True
+    if not inputAtEof:
+        if inputSelector is None:
+            openInputSelector()
+        if inputSelector.select(0):
+            readInputChunk()
+    return bool(inputBuffer)
+
+
+def readLine(prompt):
+    """Show a prompt and return the next line from stdin, running the watchdog while waiting."""
+    global inputBuffer, inputAtEof
+
+    if daemonLost:
+        raise EOFError
+    if inputSelector is None:
+        openInputSelector()
+
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+
+    while b"\n" not in inputBuffer:
+        if inputAtEof:
+            # End of input - hand back a final unterminated line before reporting EOF
+            if inputBuffer:
+                break
+            inputAtEof = False  # Reported once, like os.read(); a terminal can still be read after CTRL+D
+            raise EOFError
+        if not inputSelector.select(watchdogWait()):
+            watchdogTick()
+            continue
+        readInputChunk()
+
+    line, _, inputBuffer = inputBuffer.partition(b"\n")
+    return line.decode(errors="replace").rstrip("\r")
 
 
 
@@ -472,150 +998,280 @@ def printMenu():
 #           - Motors 3 & 4 (servos): asks for an angle in degrees (0-180°)
 #       3. Setting 0% speed automatically turns that NEO 550 motor off
 #       4. Setting 0° moves the servo to the 0° position (does NOT turn it off)
-#       5. The PWM duty cycle is calculated automatically from the typed value
+#       5. Re-entering the value a motor is already running at sends nothing
+#       6. The PWM duty cycle is calculated automatically from the typed value
+#       7. The prompts for each kind of motor live in their own function, picked
+#          from MOTOR_PROMPTS by the motor's kind
+#       8. A whole command can also be typed on one line ("1 40", "2 up 50", "3 90");
+#          handleMotorLine() reads every field from that line instead of prompting
 #
 #   Parameters:
 #       motorNum (int) - which motor was selected (1-4), passed from the main loop
+#       motor (MotorState) - that motor's entry in MOTORS (prompt functions only)
 #
 #   Returns:
-#       None - modifies global state variables and sends PWM signals
+#       None - updates the motor's MOTORS entry and sends PWM signals
 #####################################################################################################################
 
-def handleMotorCommand(motorNum):
-    """Prompt for speed or angle and apply it to the selected motor."""
-    global augerActive, augerSpeed
-    global platformActive, platformSpeed, platformDirection
-    global chamberLidActive, chamberLidAngle
-    global soilDropActive, soilDropAngle
+def parseBounded(raw, low, high):
+    """Return raw as an int if it is a whole number from low to high, otherwise None."""
+    if raw.isdecimal():
+        value = int(raw)
+        if low <= value <= high:
+            return value
+    return None
 
-    # ============================================================
-    # Motor 1 - Auger (NEO 550, forward only)
-    #   - Ask for speed 0-100%
-    #   - 0% automatically turns the motor off
-    # ============================================================
-    if motorNum == 1:
-        try:
-            speedRaw = input("  Enter speed (0-100%): ").strip()
-        except (EOFError, KeyboardInterrupt):
-            print("")
-            return
-        try:
-            speed = int(speedRaw)
-        except ValueError:
-            print("[WARN] Speed must be a number 0-100.")
-            return
-        if speed < 0 or speed > 100:
-            print("[WARN] Speed must be 0-100.")
-            return
 
-        # 0% means turn the motor off
-        if speed == 0:
-            stopSingleMotor(1)
-            return
+# Accepted answers to the platform direction prompt (built once, not per prompt)
+UP_WORDS = frozenset(("up", "forward"))
+DOWN_WORDS = frozenset(("down", "reverse"))
 
-        augerActive = True
-        augerSpeed = speed
-        setSparkMotor(AUGER_PIN, augerSpeed, "forward")
-        infoLine = f"[INFO] Auger speed set to {augerSpeed}%"
-        print(infoLine)
+# Platform direction --> the direction setSparkMotor() expects
+SPARK_DIRECTIONS = {
+    "up": "forward",
+    "down": "reverse",
+}
 
+
+def promptSparkMotor(motorNum, motor):
+    """Ask for direction (if bidirectional) and speed, then drive a NEO 550."""
     # ============================================================
-    # Motor 2 - Platform (NEO 550, bidirectional)
-    #   - Ask for direction (up/down) first
+    # NEO 550 motors (Auger, Platform)
+    #   - Bidirectional motors (Platform) ask for direction (up/down) first
     #   - Then ask for speed 0-100%
     #   - 0% automatically turns the motor off
     # ============================================================
-    elif motorNum == 2:
+    direction = "up"
+    if motor.bidirectional:
         try:
-            dirRaw = input("  Direction (up/down): ").strip().lower()
+            dirRaw = readLine("  Direction (up/down): ").strip().lower()
         except (EOFError, KeyboardInterrupt):
             print("")
             return
-        if dirRaw in ("up", "forward"):
+        if dirRaw in UP_WORDS:
             direction = "up"
-        elif dirRaw in ("down", "reverse"):
+        elif dirRaw in DOWN_WORDS:
             direction = "down"
         else:
             print("[WARN] Direction must be 'up' or 'down'.")
             return
 
-        try:
-            speedRaw = input("  Enter speed (0-100%): ").strip()
-        except (EOFError, KeyboardInterrupt):
-            print("")
-            return
-        try:
-            speed = int(speedRaw)
-        except ValueError:
-            print("[WARN] Speed must be a number 0-100.")
-            return
-        if speed < 0 or speed > 100:
-            print("[WARN] Speed must be 0-100.")
-            return
+    try:
+        speedRaw = readLine("  Enter speed (0-100%): ").strip()
+    except (EOFError, KeyboardInterrupt):
+        print("")
+        return
+    speed = parseBounded(speedRaw, 0, 100)
+    if speed is None:
+        print("[WARN] Speed must be a number 0-100.")
+        return
 
-        # 0% means turn the motor off
-        if speed == 0:
-            stopSingleMotor(2)
-            return
+    applySparkSpeed(motorNum, motor, speed, direction)
 
-        platformActive = True
-        platformSpeed = speed
-        platformDirection = direction
-        sparkDir = "forward" if platformDirection == "up" else "reverse"
-        setSparkMotor(PLATFORM_PIN, platformSpeed, sparkDir)
-        infoLine = f"[INFO] Platform speed set to {platformSpeed}% ({platformDirection.upper()})"
-        print(infoLine)
 
+def applySparkSpeed(motorNum, motor, speed, direction):
+    """Drive a NEO 550 at an already-validated speed and direction."""
+    # 0% means turn the motor off
+    if speed == 0:
+        stopSingleMotor(motorNum)
+        return
+
+    # Already running at this speed and direction - nothing to send
+    if motor.active and motor.speed == speed and motor.direction == direction:
+        sameLine = f"[INFO] {motor.shortName} already at {speed}%"
+        print(sameLine)
+        return
+
+    motor.active = True
+    motor.speed = speed
+    motor.direction = direction
+    setSparkMotor(motor.pin, speed, SPARK_DIRECTIONS[direction])
+    if motor.bidirectional:
+        infoLine = f"[INFO] {motor.shortName} speed set to {speed}% ({direction.upper()})"
+    else:
+        infoLine = f"[INFO] {motor.shortName} speed set to {speed}%"
+    print(infoLine)
+
+
+def promptServo(motorNum, motor):
+    """Ask for an angle and move a servo."""
     # ============================================================
-    # Motor 3 - Chamber Lid Servo (SM-S2309S)
+    # Servos (Chamber Lid SM-S2309S, Soil Dropper SG92R)
     #   - Ask for angle 0-180°
     #   - 0° moves the servo to the 0° position (resets angle)
     # ============================================================
-    elif motorNum == 3:
-        try:
-            angleRaw = input("  Enter angle (0-180°): ").strip()
-        except (EOFError, KeyboardInterrupt):
-            print("")
-            return
-        try:
-            angle = int(angleRaw)
-        except ValueError:
-            print("[WARN] Angle must be a number 0-180.")
+    try:
+        angleRaw = readLine("  Enter angle (0-180°): ").strip()
+    except (EOFError, KeyboardInterrupt):
+        print("")
+        return
+    angle = parseBounded(angleRaw, 0, 180)
+    if angle is None:
+        print("[WARN] Angle must be a number 0-180.")
+        return
+
+    applyServoAngle(motor, angle)
+
+
+def applyServoAngle(motor, angle):
+    """Move a servo to an already-validated angle."""
+    # Already holding this angle - re-sending would only restart the waveform
+    if motor.active and motor.angle == angle:
+        sameLine = f"[INFO] {motor.shortName} already at {angle}°"
+        print(sameLine)
+        return
+
+    motor.active = True
+    motor.angle = angle
+    setServoAngle(motor.pin, angle)
+    infoLine = f"[INFO] {motor.shortName} angle set to {angle}°"
+    print(infoLine)
+
+
+# Prompt function for each motor kind - one dict lookup picks the right one
+MOTOR_PROMPTS = {
+    "spark": promptSparkMotor,
+    "servo": promptServo,
+}
+
+
+def handleMotorCommand(motorNum):
+    """Prompt for speed or angle and apply it to the selected motor."""
+    motor = MOTORS[motorNum]
+    MOTOR_PROMPTS[motor.kind](motorNum, motor)
+
+
+# One-line motor commands: motor number, optional direction, speed or angle
+#   e.g. "1 40", "2 up 50", "2 down 30", "3 90"
+MOTOR_LINE_RE = re.compile(r"([1-4])(?:\s+(up|down|forward|reverse))?\s+(\d+)")
+
+
+def handleMotorLine(match):
+    """Apply a one-line motor command matched by MOTOR_LINE_RE without prompting."""
+    motorNum = int(match[1])
+    dirWord = match[2]
+    value = int(match[3])
+    motor = MOTORS[motorNum]
+
+    if motor.kind == "servo":
+        if dirWord is not None:
+            print("[WARN] Servos only take an angle (e.g. 3 90).")
             return
-        if angle < 0 or angle > 180:
+        if value > 180:
             print("[WARN] Angle must be 0-180.")
             return
+        applyServoAngle(motor, value)
+        return
 
-        chamberLidActive = True
-        chamberLidAngle = angle
-        setServoAngle(CHAMBER_LID_PIN, chamberLidAngle, CHAMBER_LID_MIN_US, CHAMBER_LID_MAX_US)
-        infoLine = f"[INFO] Chamber Lid angle set to {chamberLidAngle}°"
-        print(infoLine)
+    if dirWord is None:
+        if motor.bidirectional:
+            warnLine = f"[WARN] {motor.shortName} needs a direction (e.g. {motorNum} up {value})."
+            print(warnLine)
+            return
+        direction = "up"
+    else:
+        direction = "up" if dirWord in UP_WORDS else "down"
+        if direction == "down" and not motor.bidirectional:
+            warnLine = f"[WARN] {motor.shortName} runs forward only."
+            print(warnLine)
+            return
+    if value > 100:
+        print("[WARN] Speed must be 0-100.")
+        return
+    applySparkSpeed(motorNum, motor, value, direction)
 
-    # ============================================================
-    # Motor 4 - Soil Dropper Servo (SG92R)
-    #   - Ask for angle 0-180°
-    #   - 0° moves the servo to the 0° position (resets angle)
-    # ============================================================
-    elif motorNum == 4:
-        try:
-            angleRaw = input("  Enter angle (0-180°): ").strip()
-        except (EOFError, KeyboardInterrupt):
-            print("")
+
+
+
+#####################################################################################################################
+# Batched Servo Moves - Move Several Servos on the Same Edge
+#
+#   How it works:
+#       1. The user types a sequence of motor,angle pairs separated by ";" (e.g. 3,90;4,45)
+#       2. Every pair is validated first - if any pair is bad, or a motor appears twice,
+#          nothing moves
+#       3. Each move is queued with queueServoMove() instead of being sent right away
+#       4. flushServoMoves() sends the whole batch at once:
+#           - one queued move goes out the normal way (setServoAngle)
+#           - several queued moves become ONE composite waveform (setMotors), so both
+#             servos start on the same 20 ms edge with one wave build instead of one
+#             pigpio round-trip per servo
+#
+#   Parameters:
+#       raw (str) - the sequence exactly as typed at the main prompt
+#
+#   Returns:
+#       None - updates the servos' MOTORS entries and sends PWM signals
+#####################################################################################################################
+
+pendingServoMoves = {}  # motor number -> angle, waiting for flushServoMoves()
+
+
+def queueServoMove(motorNum, angle):
+    """Record a servo move to send with the next flushServoMoves()."""
+    pendingServoMoves[motorNum] = angle
+
+
+def flushServoMoves():
+    """Send every queued servo move in one batch and clear the queue."""
+    if not pendingServoMoves:
+        return
+
+    if len(pendingServoMoves) == 1:
+        ((motorNum, angle),) = pendingServoMoves.items()
+        setServoAngle(MOTORS[motorNum].pin, angle)
+    else:
+        pulseWidths = {}
+        for motorNum, angle in pendingServoMoves.items():
+            pin = MOTORS[motorNum].pin
+            # Chamber lid at 0° means signal off, same as setServoAngle()
+            if pin == CHAMBER_LID_PIN and angle <= 0:
+                pulseWidths[pin] = 0
+            else:
+                pulseWidths[pin] = SERVO_US_TABLES[pin][angle]
+        setMotors(
+            lid=pulseWidths.get(CHAMBER_LID_PIN),
+            dropper=pulseWidths.get(SOIL_DROP_PIN),
+        )
+
+    pendingServoMoves.clear()
+
+
+def handleServoSequence(raw):
+    """Parse a motor,angle;motor,angle sequence and move those servos together."""
+    moves = []
+    for part in raw.split(";"):
+        fields = part.split(",")
+        if len(fields) != 2:
+            warnLine = f"[WARN] '{part.strip()}' is not a motor,angle pair (e.g. 3,90)."
+            print(warnLine)
             return
-        try:
-            angle = int(angleRaw)
-        except ValueError:
-            print("[WARN] Angle must be a number 0-180.")
+        motorRaw, angleRaw = fields[0].strip(), fields[1].strip()
+        if not motorRaw.isdecimal() or not angleRaw.isdecimal():
+            print("[WARN] Motor and angle must be numbers (e.g. 3,90).")
+            return
+        motorNum, angle = int(motorRaw), int(angleRaw)
+        motor = MOTORS.get(motorNum)
+        if motor is None or motor.kind != "servo":
+            print("[WARN] Sequences can only move the servos (motors 3 and 4).")
             return
-        if angle < 0 or angle > 180:
+        if angle > 180:
             print("[WARN] Angle must be 0-180.")
             return
+        if any(movedNum == motorNum for movedNum, _ in moves):
+            print(f"[WARN] Motor {motorNum} appears more than once in the sequence.")
+            return
+        moves.append((motorNum, angle))
+
+    for motorNum, angle in moves:
+        motor = MOTORS[motorNum]
+        motor.active = True
+        motor.angle = angle
+        queueServoMove(motorNum, angle)
+    flushServoMoves()
 
-        soilDropActive = True
-        soilDropAngle = angle
-        setServoAngle(SOIL_DROP_PIN, soilDropAngle, SOIL_DROP_MIN_US, SOIL_DROP_MAX_US)
-        infoLine = f"[INFO] Soil Dropper angle set to {soilDropAngle}°"
+    for motorNum, angle in moves:
+        infoLine = f"[INFO] {MOTORS[motorNum].shortName} angle set to {angle}°"
         print(infoLine)
 
 
@@ -630,22 +1286,21 @@ def handleMotorCommand(motorNum):
 #       3. Resets the motor's state variables
 #
 #   Parameters:
-#       None - reads input directly from the user via input()
+#       None - reads input directly from the user via readLine()
 #
 #   Returns:
-#       None - modifies global state variables and sends PWM signals
+#       None - updates the motor's MOTORS entry and sends PWM signals
 #####################################################################################################################
 
 def handleOffCommand():
     """Ask which motor to turn off and stop it."""
     try:
-        motorRaw = input("  Turn off motor (1-4): ").strip()
+        motorRaw = readLine("  Turn off motor (1-4): ").strip()
     except (EOFError, KeyboardInterrupt):
         print("")
         return
-    try:
-        motorNum = int(motorRaw)
-    except ValueError:
+    motorNum = parseBounded(motorRaw, 1, 4)
+    if motorNum is None:
         print("[WARN] Please enter a number 1-4.")
         return
     stopSingleMotor(motorNum)
@@ -657,26 +1312,87 @@ def handleOffCommand():
 # Main CLI Loop
 #
 #   How it works:
-#       1. On startup, prints the command menu, motor list, and status table
-#       2. The menu and motor list reprint before every prompt so the user always
-#          sees what they can type
+#       1. On startup, draws the status table, command menu, and motor list
+#       2. In a terminal they stay fixed at the top of the screen; when piped, the
+#          menu and motor list reprint before every prompt instead
 #       3. The user types a motor number (1-4) to directly select and control it,
 #          or types a utility command (off, stop, status, help, q)
-#       4. After each command, the status table prints, then the menu reprints
+#          - Each command word is looked up in the COMMANDS table
+#          - A full motor command on one line ("2 up 50") is applied without prompts
+#       4. After each command, the motor status rows update (or the table reprints)
+#          - When several lines arrive at once (pasted or piped), the update waits
+#            until the last of them has run
 #       5. The loop continues until the user types "q"
 #       6. On exit (or crash), all PWM signals are stopped and GPIO pins are released
 #####################################################################################################################
 
 def main():
     """Run the main menu loop."""
-    printStatus()
+    global fixedScreen
+
+    fixedScreen = useFixedScreen()
+    if fixedScreen:
+        drawScreen()
+    else:
+        printStatus()
+
+    try:
+        runCommandLoop()
+    finally:
+        if fixedScreen:
+            restoreScreen()
+
+
+def showHelp():
+    """Show the command menu again."""
+    if fixedScreen:
+        drawScreen()  # Redraw the whole layout (e.g. after the terminal was resized)
+    # Plain mode: menu reprints at the top of the loop
+
+
+def handleStopCommand():
+    """Stop every motor and confirm it."""
+    stopAllMotors()
+    print("[INFO] ALL MOTORS STOPPED.")
+
+
+# Command dispatch table
+#   - Maps each command word to (handler, showStatus)
+#   - handler None means quit
+#   - showStatus True prints the updated status table after the handler runs
+COMMANDS = {
+    "q": (None, False),
+    "help": (showHelp, False),
+    "h": (showHelp, False),
+    "status": (printStatus, False),
+    "s": (printStatus, False),
+    "1": (lambda: handleMotorCommand(1), True),
+    "2": (lambda: handleMotorCommand(2), True),
+    "3": (lambda: handleMotorCommand(3), True),
+    "4": (lambda: handleMotorCommand(4), True),
+    "off": (handleOffCommand, True),
+    "stop": (handleStopCommand, True),
+    "x": (handleStopCommand, True),
+}
+
+
+def runCommandLoop():
+    """Read and run commands until the user quits."""
+    statusDirty = False  # A command changed a motor and the status hasn't been redrawn yet
 
     while True:
-        # Reprint the commands and motor list before every prompt
-        printMenu()
+        # Redraw only once every queued line has been handled - a pasted burst of
+        # commands then ends with one status update instead of one per command
+        if not inputPending():
+            if statusDirty:
+                printStatus()
+                statusDirty = False
+            # Reprint the commands and motor list before every prompt (plain mode only)
+            if not fixedScreen:
+                printMenu()
 
         try:
-            raw = input(">> ").strip()
+            raw = readLine(">> ").strip()
         except (EOFError, KeyboardInterrupt):
             # Handle CTRL+C or CTRL+D gracefully
             print("")
@@ -686,84 +1402,141 @@ def main():
         if not raw:
             continue
 
-        cmd = raw.lower()
-
-        # ============================================================
-        # QUIT (q)
-        # ============================================================
-        if cmd == "q":
-            break
+        # Servo sequences like "3,90;4,45" are sent as one batch
+        if "," in raw:
+            handleServoSequence(raw)
+            statusDirty = True
+            continue
 
-        # ============================================================
-        # HELP (help, h)
-        # ============================================================
-        elif cmd in ("help", "h"):
-            continue  # Menu reprints at top of loop
-
-        # ============================================================
-        # STATUS (status, s)
-        # ============================================================
-        elif cmd in ("status", "s"):
-            printStatus()
-            continue  # Already printing status
-
-        # ============================================================
-        # MOTOR SELECTION (1-4)
-        #   - Type a motor number to jump straight into setting it
-        # ============================================================
-        elif cmd in ("1", "2", "3", "4"):
-            handleMotorCommand(int(cmd))
-
-        # ============================================================
-        # OFF - Turn off a single motor
-        # ============================================================
-        elif cmd == "off":
-            handleOffCommand()
-
-        # ============================================================
-        # STOP ALL MOTORS (stop, x)
-        # ============================================================
-        elif cmd in ("stop", "x"):
-            stopAllMotors()
-            print("[INFO] ALL MOTORS STOPPED.")
-
-        # ============================================================
-        # UNKNOWN COMMAND
-        # ============================================================
-        else:
+        entry = COMMANDS.get(raw.lower())
+        if entry is None:
+            # One-line motor commands like "2 up 50" skip the prompts
+            motorLine = MOTOR_LINE_RE.fullmatch(raw.lower())
+            if motorLine is not None:
+                handleMotorLine(motorLine)
+                statusDirty = True
+                continue
             unknownLine = f"[WARN] Unknown command: '{raw}'. Type 'help' for available commands."
             print(unknownLine)
             continue  # Don't print status for unknown commands
 
-        # Print updated status after every successful command
-        printStatus()
+        handler, showStatus = entry
+        if handler is None:
+            break  # Quit
+        handler()
+
+        # Mark the status for redraw after every command that changes a motor
+        if showStatus:
+            statusDirty = True
+
+
+
+
+#####################################################################################################################
+# Real-Time Scheduling (optional, --cpu)
+#   - On a busy Pi (camera, USB, desktop) the scheduler can delay this process for
+#     several milliseconds between a typed command and the pigpio call that applies it
+#   - "--cpu N" moves the CLI onto core N and raises it to SCHED_FIFO, so ordinary
+#     housekeeping tasks can no longer preempt it there
+#   - The process memory is also locked (mlockall), so a command never waits for
+#     a page to be read back from swap or the SD card
+#   - These need root (or CAP_SYS_NICE / CAP_IPC_LOCK); any step the system refuses is
+#     skipped with a warning and the CLI runs normally
+#   - The pulses themselves are built and queued by the pigpio daemon, not by this
+#     script, so for the full benefit give the daemon a quiet core as well:
+#       1. Keep other work off cores 2 and 3 by adding
+#          "isolcpus=2,3 nohz_full=2,3 rcu_nocbs=2,3" to the end of the single line in
+#          /boot/firmware/cmdline.txt (/boot/cmdline.txt on older Raspberry Pi OS), then reboot
+#       2. Hold core 3 at full clock so its timing doesn't drift with the CPU governor:
+#          echo performance | sudo tee /sys/devices/system/cpu/cpu3/cpufreq/scaling_governor
+#       3. Start the daemon on core 3 with real-time priority:
+#          sudo chrt -f 50 taskset -c 3 pigpiod
+#       4. Run the CLI on core 2: sudo python Motor_Controller_CLI.py --cpu 2
+#
+#   Parameters:
+#       cpu (int) - core number to run on (0-3 on a Pi 4/5)
+#
+#   Returns:
+#       None - prints a [WARN] line for every setting that could not be applied
+#####################################################################################################################
+
+RT_PRIORITY = 20  # SCHED_FIFO priority (1-99); low enough to stay below kernel IRQ threads
+MCL_CURRENT = 1  # mlockall() flags from <sys/mman.h> (Linux)
+MCL_FUTURE = 2
+
+
+def useRealtimeCore(cpu):
+    """Pin this process to one CPU core, switch it to SCHED_FIFO, and lock its memory."""
+    try:
+        os.sched_setaffinity(0, {cpu})
+        print(f"[INFO] Pinned to CPU core {cpu}.")
+    except AttributeError:
+        print("[WARN] CPU pinning is only supported on Linux.")
+        return
+    except OSError as e:
+        print(f"[WARN] Could not pin to CPU core {cpu} ({e}).")
+
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(RT_PRIORITY))
+        print(f"[INFO] Using SCHED_FIFO priority {RT_PRIORITY}.")
+    except OSError as e:
+        print(f"[WARN] Could not switch to SCHED_FIFO ({e}); run with sudo for real-time priority.")
+
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.mlockall(MCL_CURRENT | MCL_FUTURE) != 0:
+        errorText = os.strerror(ctypes.get_errno())
+        print(f"[WARN] Could not lock memory ({errorText}).")
 
 
 
 
 #####################################################################################################################
 # Main Execution and Cleanup
-#   - Runs the main CLI loop
+#   - Only runs when the script is executed directly (not when imported)
+#   - Reads the command-line options (--cpu), connects to pigpio and initializes the
+#     motor pins, then runs the main CLI loop
 #   - The "finally" block ensures all PWM signals are stopped and the pigpio
 #     connection is released, even if the program crashes or is interrupted
 #   - We send neutral (1500 µs) to the Spark MAX controllers before disconnecting
 #     so the NEO 550 motors don't get an unexpected signal during shutdown
+#   - Instead of sleeping a fixed time, we poll pi.wave_tx_busy() until the DMA
+#     waveform has really stopped (bounded to a few frames); the servo pulses set
+#     above are generated by the pigpio daemon and keep running after we disconnect
+#   - If the watchdog found the daemon gone, there is nothing left to send the stop
+#     signals to, so we only close the connection and exit with an error status
 #####################################################################################################################
 
-try:
-    main()
-finally:
-    # Send neutral / off signals before shutting down
-    pi.set_servo_pulsewidth(AUGER_PIN, SPARK_NEUTRAL_US)
-    pi.set_servo_pulsewidth(PLATFORM_PIN, SPARK_NEUTRAL_US)
-    # Chamber lid: stop the DMA waveform and ensure pin is LOW
-    pi.wave_tx_stop()
-    pi.wave_clear()
-    pi.write(CHAMBER_LID_PIN, 0)
-    # Soil dropper: standard servo control
-    pi.set_servo_pulsewidth(SOIL_DROP_PIN, 0)
-    time.sleep(0.1)  # Brief pause to let the signals settle
-
-    # Disconnect from the pigpio daemon and release all GPIO resources
-    pi.stop()
-    print("[INFO] All motors stopped. GPIO cleaned up safely.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LUSI Science Module - Motor Controller CLI")
+    parser.add_argument("--cpu", type=int, default=None, help="Run on this CPU core with real-time priority (needs sudo)")
+    args = parser.parse_args()
+    if args.cpu is not None:
+        useRealtimeCore(args.cpu)
+
+    setupGpio()
+    try:
+        main()
+    finally:
+        if daemonLost:
+            # Nothing left to send commands to - just close our end of the connection
+            try:
+                pi.stop()
+            except DAEMON_ERRORS:
+                pass
+            print("[WARN] pigpio daemon unreachable - motors could not be stopped from here.")
+            sys.exit(1)
+
+        # Stop the shared waveform, send neutral to the Spark MAXes, and turn the servos off
+        stopAllMotors()
+        pi.wave_clear()
+        # Wait until the DMA engine has actually finished the waveform - normally within
+        # one 20 ms frame; the deadline keeps a wedged daemon from hanging shutdown
+        deadline = time.monotonic() + 5 * PWM_PERIOD_US / 1_000_000
+        while pi.wave_tx_busy() and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+        # Remove the stop script from the daemon, then disconnect and release all GPIO resources
+        if stopScriptId >= 0:
+            pi.delete_script(stopScriptId)
+        pi.stop()
+        print("[INFO] All motors stopped. GPIO cleaned up safely.")
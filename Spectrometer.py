@@ -60,7 +60,7 @@
 #   - numpy:
 #       - Performs fast array math on pixel intensity data
 #       - Used for polynomial fitting during calibration
-#       - Correlation coefficient calculation for calibration accuracy (R-squared)
+#       - R-squared calculation for calibration accuracy
 #   - time:
 #       - Timestamps for saved files (e.g., "Spectrum-20260226--153000.csv")
 #   - argparse:
@@ -69,6 +69,13 @@
 #       - factorial() used by the Savitzky-Golay smoothing filter
 #   - os:
 #       - File path operations for calibration data storage
+#   - fcntl / struct:
+#       - Ask a /dev/videoN node which features it supports (the V4L2 VIDIOC_QUERYCAP ioctl)
+#         so non-camera nodes can be skipped without opening them in OpenCV
+#   - threading:
+#       - Reads camera frames in a background thread so capture and drawing overlap
+#   - concurrent.futures:
+#       - Tries several candidate cameras at the same time when the default one fails
 #####################################################################################################################
 
 import cv2
@@ -78,7 +85,11 @@ import argparse
 from math import factorial
 import os
 import signal
+import threading
 import glob
+import fcntl
+import struct
+from concurrent.futures import ThreadPoolExecutor
 
 
 
@@ -90,6 +101,9 @@ import glob
 #   - BANNER_HEIGHT: Height of the status message banner at the top
 #   - PREVIEW_HEIGHT: Height of the camera preview strip
 #   - STACK_HEIGHT: Total height of the combined display (banner + preview + graph)
+#   - GRAPH_TOP: Row where the graph starts in the combined display (below banner + preview)
+#   - CROP_Y: First camera row of the preview strip (the strip is centered 40 px above the middle)
+#   - SAMPLE_ROW: Center row of the 3 preview rows that are averaged into the intensity data
 #####################################################################################################################
 
 FRAME_WIDTH = 800
@@ -98,6 +112,11 @@ GRAPH_HEIGHT = 320
 BANNER_HEIGHT = 80
 PREVIEW_HEIGHT = 80
 STACK_HEIGHT = GRAPH_HEIGHT + BANNER_HEIGHT + PREVIEW_HEIGHT
+GRAPH_TOP = BANNER_HEIGHT + PREVIEW_HEIGHT
+CROP_Y = FRAME_HEIGHT // 2 - 40
+SAMPLE_ROW = PREVIEW_HEIGHT // 2
+GRAPH_ROWS = np.arange(GRAPH_HEIGHT)[:, np.newaxis]  # Row numbers as a column, for per-pixel masks
+GRAPH_COLUMNS = np.arange(FRAME_WIDTH)  # Column numbers, for indexing one pixel per column
 
 
 
@@ -107,12 +126,19 @@ STACK_HEIGHT = GRAPH_HEIGHT + BANNER_HEIGHT + PREVIEW_HEIGHT
 #   - DEFAULT_SAVPOLY: Starting polynomial order for the Savitzky-Golay smoothing filter (1-15)
 #   - DEFAULT_MINDIST: Minimum pixel distance between detected peaks (1-100)
 #   - DEFAULT_THRESH: Intensity threshold for peak labeling (1-100)
+#   - SAVPOLY_KEYS / MINDIST_KEYS / THRESH_KEYS: how much each tuning key changes its setting
+#     (looked up by key code, so the main loop checks one table per setting instead of a
+#     separate branch for every key)
 #####################################################################################################################
 
 DEFAULT_SAVPOLY = 7
 DEFAULT_MINDIST = 50
 DEFAULT_THRESH = 20
 
+SAVPOLY_KEYS = {ord("o"): 1, ord("l"): -1}
+MINDIST_KEYS = {ord("i"): 1, ord("k"): -1}
+THRESH_KEYS = {ord("u"): 1, ord("j"): -1}
+
 
 
 
@@ -144,9 +170,15 @@ CAL_DATA_FILE = os.path.join(SCRIPT_DIR, "caldata.txt")
 #       - Applies a gamma correction (0.8) for perceptual brightness
 #       - Wavelengths outside the visible range are shown as gray (155, 155, 155)
 #       - Based on the algorithm by Chris Webb (codedrome.com)
+#       - The colors for whole wavelengths 300-800 nm are computed once at startup into
+#         BGR_TABLE (in OpenCV's BGR order)
+#       - makeColumnColors() builds the whole row of per-column colors for a calibration by
+#         indexing BGR_TABLE with every column's wavelength rounded to a whole nm, so per-frame
+#         code can color every column with one array operation; wavelengths outside the
+#         table are computed directly
 #####################################################################################################################
 
-def wavelengthToRgb(nm):
+def computeWavelengthRgb(nm):
     """Convert a wavelength in nm to an (R, G, B) tuple."""
     gamma = 0.8
     maxIntensity = 255
@@ -200,6 +232,25 @@ def wavelengthToRgb(nm):
     return (rOut, gOut, bOut)
 
 
+RGB_LUT_MIN_NM = 300
+RGB_LUT_MAX_NM = 800
+BGR_TABLE = np.array(
+    [computeWavelengthRgb(nm)[::-1] for nm in range(RGB_LUT_MIN_NM, RGB_LUT_MAX_NM + 1)], dtype=np.uint8
+)
+
+
+def makeColumnColors(wavelengthData):
+    """Return a (width, 3) uint8 array with the BGR color of every pixel column's wavelength."""
+    # np.rint rounds halves to even, like the built-in round()
+    nm = np.rint(np.asarray(wavelengthData, dtype=np.float64)).astype(np.intp)
+    inTable = (nm >= RGB_LUT_MIN_NM) & (nm <= RGB_LUT_MAX_NM)
+    colors = np.empty((len(nm), 3), dtype=np.uint8)
+    colors[inTable] = BGR_TABLE[nm[inTable] - RGB_LUT_MIN_NM]
+    for idx in np.flatnonzero(~inTable):
+        colors[idx] = computeWavelengthRgb(int(nm[idx]))[::-1]  # Rare: a calibration reaching past the table
+    return colors
+
+
 
 
 #####################################################################################################################
@@ -221,11 +272,22 @@ def wavelengthToRgb(nm):
 #       - Reduces high-frequency noise while preserving peak shapes and widths
 #       - The larger the window, the more smoothing (but peaks may get flattened)
 #       - This is the standard SciPy Savitzky-Golay implementation
+#       - The filter coefficients only depend on (windowSize, order, deriv, rate), so they are
+#         computed once per combination and kept in SAVGOL_COEFF_CACHE; every later frame
+#         just pads and convolves (the least-squares solve only reruns when 'o'/'l' changes
+#         the order to one that hasn't been used yet)
+#       - The padded copy of the signal is written into a buffer that is allocated once per
+#         (length, halfWindow) and reused (SAVGOL_PAD_BUFFERS), instead of concatenating three
+#         new arrays every frame
 #
 #   Based on the SciPy Cookbook implementation:
 #       Copyright (c) 2001-2002 Enthought, Inc. 2003-2022, SciPy Developers. BSD License.
 #####################################################################################################################
 
+SAVGOL_COEFF_CACHE = {}  # (windowSize, order, deriv, rate) --> reversed filter kernel
+SAVGOL_PAD_BUFFERS = {}  # (signal length, halfWindow) --> reusable padded-signal buffer
+
+
 def savitzkyGolay(y, windowSize, order, deriv=0, rate=1):
     """Apply a Savitzky-Golay smoothing filter to the intensity data."""
     windowSize = int(np.abs(np.int32(windowSize)))
@@ -236,19 +298,45 @@ def savitzkyGolay(y, windowSize, order, deriv=0, rate=1):
     if windowSize < order + 2:
         raise TypeError("windowSize is too small for the polynomial order")
 
-    orderRange = range(order + 1)
     halfWindow = (windowSize - 1) // 2
 
-    # Precompute the filter coefficients using a least-squares polynomial fit
-    b = np.asmatrix([[k ** i for i in orderRange] for k in range(-halfWindow, halfWindow + 1)])
-    m = np.linalg.pinv(b).A[deriv] * rate ** deriv * factorial(deriv)
+    # Filter coefficients from a least-squares polynomial fit, computed once per setting
+    key = (windowSize, order, deriv, rate)
+    kernel = SAVGOL_COEFF_CACHE.get(key)
+    if kernel is None:
+        # Row `deriv` of pinv(b), found from a QR factorization of the Vandermonde matrix b:
+        # pinv(b) = inv(r) @ q.T, so that row is q @ solve(r.T, e) with e picking out `deriv`.
+        # Only an (order+1)-sized triangular system is solved, and it stays accurate at high
+        # orders where forming b.T @ b (or pinv's SVD of the raw powers) loses digits.
+        b = np.vander(np.arange(-halfWindow, halfWindow + 1, dtype=np.float64), order + 1, increasing=True)
+        q, r = np.linalg.qr(b)
+        e = np.zeros(order + 1)
+        e[deriv] = rate ** deriv * factorial(deriv)
+        kernel = (q @ np.linalg.solve(r.T, e))[::-1]
+        SAVGOL_COEFF_CACHE[key] = kernel
 
     # Pad the signal at the edges by reflecting values to avoid boundary artifacts
-    firstVals = y[0] - np.abs(y[1:halfWindow + 1][::-1] - y[0])
-    lastVals = y[-1] + np.abs(y[-halfWindow - 1:-1][::-1] - y[-1])
-    y = np.concatenate((firstVals, y, lastVals))
+    # (written in place into the reused buffer: head = y[0] - |y[k] - y[0]|, tail likewise)
+    y = np.asarray(y)
+    length = len(y)
+    padded = SAVGOL_PAD_BUFFERS.get((length, halfWindow))
+    if padded is None:
+        padded = np.empty(length + 2 * halfWindow, dtype=np.float64)
+        SAVGOL_PAD_BUFFERS[(length, halfWindow)] = padded
 
-    return np.convolve(m[::-1], y, mode="valid")
+    head = padded[:halfWindow]
+    np.subtract(y[1:halfWindow + 1][::-1], y[0], out=head)
+    np.abs(head, out=head)
+    np.subtract(y[0], head, out=head)
+
+    padded[halfWindow:halfWindow + length] = y
+
+    tail = padded[halfWindow + length:]
+    np.subtract(y[-halfWindow - 1:-1][::-1], y[-1], out=tail)
+    np.abs(tail, out=tail)
+    np.add(y[-1], tail, out=tail)
+
+    return np.convolve(kernel, padded, mode="valid")
 
 
 
@@ -288,14 +376,17 @@ def peakIndexes(y, thres=0.3, minDist=1, thresAbs=False):
     # Compute first order difference
     dy = np.diff(y)
 
-    # Handle plateau pixels (where diff == 0) by propagating neighbor values
-    zeros, = np.where(dy == 0)
+    # Handle plateau pixels (where diff == 0) by propagating neighbor values.
+    # Count them first so a signal without plateaus skips the whole block below.
+    isZero = dy == 0
+    zeroCount = np.count_nonzero(isZero)
 
     # Check if the signal is totally flat
-    if len(zeros) == len(y) - 1:
+    if zeroCount == len(y) - 1:
         return np.array([])
 
-    if len(zeros):
+    if zeroCount:
+        zeros = np.flatnonzero(isZero)
         zerosDiff = np.diff(zeros)
         zerosDiffNotOne, = np.add(np.where(zerosDiff != 1), 1)
         zeroPlateaus = np.split(zeros, zerosDiffNotOne)
@@ -310,32 +401,43 @@ def peakIndexes(y, thres=0.3, minDist=1, thresAbs=False):
             dy[zeroPlateaus[-1]] = dy[zeroPlateaus[-1][0] - 1]
             zeroPlateaus.pop(-1)
 
-        # For each chain of zero indexes, propagate values from the edges
+        # For each chain of zero indexes, propagate values from the edges: the left half takes
+        # the value before the plateau, the right half the value after it (a plateau is a run
+        # of consecutive indexes, so its median split is simply the middle of the run)
         for plateau in zeroPlateaus:
-            median = np.median(plateau)
-            dy[plateau[plateau < median]] = dy[plateau[0] - 1]
-            dy[plateau[plateau >= median]] = dy[plateau[-1] + 1]
-
-    # Find peaks: points where the first-order difference changes from positive to negative
-    peaks = np.where(
-        (np.hstack([dy, 0.0]) < 0.0)
-        & (np.hstack([0.0, dy]) > 0.0)
-        & (np.greater(y, thres))
-    )[0]
-
-    # Enforce minimum distance between peaks - keep the tallest ones
+            start = plateau[0]
+            end = plateau[-1] + 1
+            middle = start + len(plateau) // 2
+            dy[start:middle] = dy[start - 1]
+            dy[middle:end] = dy[end]
+
+    # Find peaks: points where the first-order difference changes from positive to negative.
+    # Only interior points can qualify, so the rising/falling tests compare overlapping views
+    # of dy (no padded copies) and the result is shifted by one to index into y
+    peaks = np.flatnonzero(
+        (dy[:-1] > 0.0)
+        & (dy[1:] < 0.0)
+        & (np.greater(y[1:-1], thres))
+    ) + 1
+
+    # Enforce minimum distance between peaks - keep the tallest ones.
+    # Works on the (short, sorted) list of peaks rather than a mask over every pixel: the
+    # neighbors within minDist of each peak are a contiguous run of that list, found for all
+    # peaks at once with searchsorted; then, tallest first, each peak that is still kept
+    # drops its neighbors. The sort is stable, so among equal heights the rightmost peak
+    # wins, whatever the intensity dtype or NumPy's default sort algorithm.
     if peaks.size > 1 and minDist > 1:
-        highest = peaks[np.argsort(y[peaks])][::-1]
-        rem = np.ones(y.size, dtype=bool)
-        rem[peaks] = False
+        order = np.argsort(y[peaks], kind="stable")[::-1].tolist()
+        firstNear = np.searchsorted(peaks, peaks - minDist).tolist()
+        pastNear = np.searchsorted(peaks, peaks + minDist, side="right").tolist()
+        keep = [True] * peaks.size
 
-        for peak in highest:
-            if not rem[peak]:
-                sl = slice(max(0, peak - minDist), peak + minDist + 1)
-                rem[sl] = True
-                rem[peak] = False
+        for i in order:
+            if keep[i]:
+                keep[firstNear[i]:pastNear[i]] = [False] * (pastNear[i] - firstNear[i])
+                keep[i] = True
 
-        peaks = np.arange(y.size)[~rem]
+        peaks = peaks[np.array(keep)]
 
     return peaks
 
@@ -362,6 +464,14 @@ def peakIndexes(y, thres=0.3, minDist=1, thresAbs=False):
 #       6. If no file is found, loads placeholder data (380-750 nm linear mapping)
 #####################################################################################################################
 
+# Banner status lines for each calibration state: 0 = defaults, 1 = 3-point fit, 2 = 4+ point fit
+CAL_MESSAGES = {
+    0: ("UNCALIBRATED!", "Defaults loaded", "Perform Calibration!"),
+    1: ("Calibrated", "Using 3 cal points", "2nd Order Polyfit"),
+    2: ("Calibrated", "Using {points} cal points", "3rd Order Polyfit"),
+}
+
+
 def readCalibration(width):
     """Read calibration data from caldata.txt and compute wavelength-per-pixel mapping."""
     errors = 0
@@ -396,19 +506,16 @@ def readCalibration(width):
         pixels = [0, 400, 800]
         wavelengths = [380, 560, 750]
 
-    # Generate wavelength data from polynomial fit
+    # Generate wavelength data from polynomial fit - np.polyval evaluates the polynomial for
+    # every pixel column in one call (coefficients are highest power first)
     wavelengthData = []
+    pixelColumns = np.arange(width, dtype=np.float64)
 
     if len(pixels) == 3:
         print("[INFO] Calculating 2nd-order polynomial fit (3 calibration points)...")
-        coefficients = np.poly1d(np.polyfit(pixels, wavelengths, 2))
-        c1 = coefficients[2]
-        c2 = coefficients[1]
-        c3 = coefficients[0]
-        print(f"[INFO] Coefficients: {c1}, {c2}, {c3}")
-        for pixel in range(width):
-            wl = (c1 * pixel ** 2) + (c2 * pixel) + c3
-            wavelengthData.append(round(wl, 6))
+        coefficients = np.polyfit(pixels, wavelengths, 2)
+        print(f"[INFO] Coefficients: {', '.join(str(c) for c in coefficients)}")
+        wavelengthData = np.round(np.polyval(coefficients, pixelColumns), 6).tolist()
         print("[INFO] Wavelength data generated")
         print("[WARN] Calibration with only 3 wavelengths will not be highly accurate")
         if errors == 1:
@@ -418,40 +525,24 @@ def readCalibration(width):
 
     if len(pixels) > 3:
         print("[INFO] Calculating 3rd-order polynomial fit (4+ calibration points)...")
-        coefficients = np.poly1d(np.polyfit(pixels, wavelengths, 3))
-        c1 = coefficients[3]
-        c2 = coefficients[2]
-        c3 = coefficients[1]
-        c4 = coefficients[0]
-        print(f"[INFO] Coefficients: {c1}, {c2}, {c3}, {c4}")
-        for pixel in range(width):
-            wl = (c1 * pixel ** 3) + (c2 * pixel ** 2) + (c3 * pixel) + c4
-            wavelengthData.append(round(wl, 6))
+        coefficients = np.polyfit(pixels, wavelengths, 3)
+        print(f"[INFO] Coefficients: {', '.join(str(c) for c in coefficients)}")
+        wavelengthData = np.round(np.polyval(coefficients, pixelColumns), 6).tolist()
 
         # Calculate R-squared to validate the calibration fit
-        predicted = []
-        for px in pixels:
-            y = (c1 * px ** 3) + (c2 * px ** 2) + (c3 * px) + c4
-            predicted.append(y)
-        corrMatrix = np.corrcoef(wavelengths, predicted)
-        corr = corrMatrix[0, 1]
-        rSquared = corr ** 2
+        # (R-squared = 1 - residual sum of squares / total sum of squares; for a least-squares
+        # fit this equals the squared correlation, without building a covariance matrix)
+        predicted = np.polyval(coefficients, np.asarray(pixels, dtype=np.float64))
+        measured = np.asarray(wavelengths, dtype=np.float64)
+        residuals = measured - predicted
+        deviations = measured - measured.mean()
+        rSquared = 1.0 - np.dot(residuals, residuals) / np.dot(deviations, deviations)
         print(f"[INFO] R-Squared = {rSquared}")
         message = 2
 
     # Build status messages for the display banner
-    if message == 0:
-        calMsg1 = "UNCALIBRATED!"
-        calMsg2 = "Defaults loaded"
-        calMsg3 = "Perform Calibration!"
-    elif message == 1:
-        calMsg1 = "Calibrated"
-        calMsg2 = "Using 3 cal points"
-        calMsg3 = "2nd Order Polyfit"
-    else:
-        calMsg1 = "Calibrated"
-        calMsg2 = f"Using {len(pixels)} cal points"
-        calMsg3 = "3rd Order Polyfit"
+    calMsg1, calMsg2, calMsg3 = CAL_MESSAGES[message]
+    calMsg2 = calMsg2.format(points=len(pixels))
 
     return [wavelengthData, calMsg1, calMsg2, calMsg3]
 
@@ -520,34 +611,167 @@ def writeCalibration(clickArray):
 #       - These positions are used to draw the vertical grid lines on the spectrum graph
 #       - Only includes positions where the wavelength is within 1 nm of the target (avoids
 #         crowding at the edges where wavelengths may bunch up)
+#       - All targets are matched at once: a (targets x pixels) table of distances is built
+#         with NumPy and argmin picks the closest pixel for each row (the first one on a tie),
+#         instead of a Python min() over every pixel for every target wavelength
 #####################################################################################################################
 
+def nearestPixels(wavelengths, targets):
+    """Return the index of the closest wavelength to each target and its distance in nm."""
+    distances = np.abs(targets[:, np.newaxis] - wavelengths[np.newaxis, :])
+    positions = np.argmin(distances, axis=1)
+    return positions, distances[np.arange(len(targets)), positions]
+
+
 def generateGraticule(wavelengthData):
     """Compute pixel positions for 10 nm and 50 nm graticule lines."""
-    low = int(round(wavelengthData[0])) - 10
-    high = int(round(wavelengthData[len(wavelengthData) - 1])) + 10
-
-    tens = []
-    for i in range(low, high):
-        if i % 10 == 0:
-            position = min(enumerate(wavelengthData), key=lambda x: abs(i - x[1]))
-            if abs(i - position[1]) < 1:
-                tens.append(position[0])
-
-    fifties = []
-    for i in range(low, high):
-        if i % 50 == 0:
-            position = min(enumerate(wavelengthData), key=lambda x: abs(i - x[1]))
-            if abs(i - position[1]) < 1:
-                labelPos = position[0]
-                labelTxt = int(round(position[1]))
-                fifties.append([labelPos, labelTxt])
+    wavelengths = np.asarray(wavelengthData, dtype=np.float64)
+    low = int(round(wavelengths[0])) - 10
+    high = int(round(wavelengths[-1])) + 10
+
+    # First multiple of 10 (or 50) at or above low, up to (not including) high
+    tenTargets = np.arange(low + (-low) % 10, high, 10, dtype=np.float64)
+    positions, distances = nearestPixels(wavelengths, tenTargets)
+    tens = positions[distances < 1].tolist()
+
+    fiftyTargets = np.arange(low + (-low) % 50, high, 50, dtype=np.float64)
+    positions, distances = nearestPixels(wavelengths, fiftyTargets)
+    positions = positions[distances < 1]
+    fifties = [[position, int(round(wavelengths[position]))] for position in positions.tolist()]
 
     return [tens, fifties]
 
 
 
 
+
+#####################################################################################################################
+# Helper Functions - Pre-Rendered Label Sprites
+#
+#   cv2.putText() rasterizes every character of a Hershey font string each time it is called.
+#   Peak labels repeat from frame to frame (they only change when a peak moves to another
+#   pixel), so each label is drawn once into a small image ("sprite") and later frames just
+#   copy those pixels in.
+#
+#   makePeakLabelSprite(text):
+#       - Draws the yellow peak label box (black border, black text) exactly as it appears on
+#         the graph, with the box's top-left corner at (0, 0)
+#       - Results are cached in PEAK_LABEL_SPRITES, keyed by the label text
+#
+#   drawSprite(image, sprite, x, y):
+#       - Copies a sprite into image with its top-left corner at (x, y), clipped to the image
+#         edges (labels near the left/right edge or a tall peak hang partly off the graph)
+#####################################################################################################################
+
+LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+LABEL_TEXT_OFFSET = 12  # Labels start this many pixels left of their graticule line or peak
+
+# Peak label box: 63 x 16 pixels, text baseline 3 pixels above the bottom border
+PEAK_LABEL_WIDTH = 63
+PEAK_LABEL_HEIGHT = 16
+PEAK_LABEL_SPRITES = {}
+
+
+def makePeakLabelSprite(text):
+    """Return the cached image of a yellow peak label box, rendering it on first use."""
+    sprite = PEAK_LABEL_SPRITES.get(text)
+    if sprite is None:
+        sprite = np.empty((PEAK_LABEL_HEIGHT, PEAK_LABEL_WIDTH, 3), dtype=np.uint8)
+        sprite[:] = (0, 255, 255)
+        cv2.rectangle(sprite, (0, PEAK_LABEL_HEIGHT - 1), (PEAK_LABEL_WIDTH - 1, 0), (0, 0, 0), 1)
+        cv2.putText(sprite, text, (2, PEAK_LABEL_HEIGHT - 4), LABEL_FONT, 0.4, (0, 0, 0), 1, cv2.LINE_AA)
+        PEAK_LABEL_SPRITES[text] = sprite
+    return sprite
+
+
+def drawSprite(image, sprite, x, y):
+    """Copy a sprite into image with its top-left corner at (x, y), clipped to the image."""
+    spriteH, spriteW = sprite.shape[:2]
+    imageH, imageW = image.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + spriteW, imageW), min(y + spriteH, imageH)
+    if x0 >= x1 or y0 >= y1:
+        return
+    image[y0:y1, x0:x1] = sprite[y0 - y:y1 - y, x0 - x:x1 - x]
+
+
+
+
+
+#####################################################################################################################
+# Helper Function - Draw the Graph Background
+#
+#   Parameters:
+#       tens (list)    - pixel positions of the 10 nm lines (from generateGraticule)
+#       fifties (list) - [[pixel, wavelength], ...] for the labeled 50 nm lines
+#
+#   Returns:
+#       image - GRAPH_HEIGHT x FRAME_WIDTH white background with the graticule drawn on it
+#
+#   How it works:
+#       - Draws the light gray 10 nm lines, the black 50 nm lines with their "450nm" labels,
+#         and the horizontal reference lines every 64 pixels
+#       - The background only changes after a recalibration, so it is drawn once and each
+#         frame starts by copying it into the graph buffer
+#####################################################################################################################
+
+def makeGraphBackground(tens, fifties):
+    """Draw the white graph background with its 10 nm / 50 nm graticule and reference lines."""
+    background = np.full([GRAPH_HEIGHT, FRAME_WIDTH, 3], 255, dtype=np.uint8)
+
+    # Vertical graticule lines every 10 nm (light gray)
+    for position in tens:
+        cv2.line(background, (position, 15), (position, GRAPH_HEIGHT), (200, 200, 200), 1)
+
+    # Vertical graticule lines every 50 nm (black, with labels)
+    for position, wavelength in fifties:
+        cv2.line(background, (position, 15), (position, GRAPH_HEIGHT), (0, 0, 0), 1)
+        cv2.putText(background, f"{wavelength}nm", (position - LABEL_TEXT_OFFSET, 12), LABEL_FONT, 0.4, (0, 0, 0), 1, cv2.LINE_AA)
+
+    # Horizontal reference lines every 64 pixels (light gray)
+    background[64::64] = (100, 100, 100)
+
+    return background
+
+
+
+
+#####################################################################################################################
+# Helper Function - Locate the Waterfall's Dashed Graticule Lines
+#
+#   Parameters:
+#       fifties (list) - [[pixel, wavelength], ...] for the 50 nm lines (from generateGraticule)
+#
+#   Returns:
+#       tuple - (blackPixels, whitePixels), each a (rows, columns) index pair into the
+#               STACK_HEIGHT x FRAME_WIDTH waterfall window image
+#
+#   How it works:
+#       - Each 50 nm line on the waterfall is a column of short dashes every 20 rows: a 2-pixel
+#         thick black dash with a 1-pixel white dash on top, so it shows on any background
+#       - The dashes are drawn once onto blank masks with cv2.line() (so they cover exactly the
+#         same pixels as before), and the pixel positions are kept
+#       - Each frame then paints all dashes with two indexed assignments instead of two
+#         cv2.line() calls per dash
+#####################################################################################################################
+
+def makeWaterfallDashes(fifties):
+    """Return the (rows, columns) of the black and white waterfall graticule dash pixels."""
+    blackMask = np.zeros([STACK_HEIGHT, FRAME_WIDTH], dtype=np.uint8)
+    whiteMask = np.zeros([STACK_HEIGHT, FRAME_WIDTH], dtype=np.uint8)
+    yStart = GRAPH_TOP + 2
+    firstDash = yStart + (-yStart) % 20
+
+    for position, wavelength in fifties:
+        for y in range(firstDash, STACK_HEIGHT, 20):
+            cv2.line(blackMask, (position, y), (position, y + 1), 255, 2)
+            cv2.line(whiteMask, (position, y), (position, y + 1), 255, 1)
+
+    return np.nonzero(blackMask), np.nonzero(whiteMask)
+
+
+
+
 #####################################################################################################################
 # Helper Function - Save Spectrum Data to Disk
 #
@@ -588,11 +812,11 @@ def saveSnapshot(saveData):
     cv2.imwrite(imgPath, spectrumImage)
     print(f"[INFO] Spectrum image saved: {imgPath}")
 
+    # np.savetxt formats all rows in C and writes them in one go (wavelengths are already
+    # rounded to 6 decimals by readCalibration, so %.6f keeps every digit)
     csvPath = os.path.join(CAPTURES_DIR, f"Spectrum-{now}.csv")
-    with open(csvPath, "w") as f:
-        f.write("Wavelength,Intensity\n")
-        for wl, intensity in zip(graphData[0], graphData[1]):
-            f.write(f"{wl},{intensity}\n")
+    csvData = np.column_stack((np.asarray(graphData[0], dtype=np.float64), np.asarray(graphData[1], dtype=np.float64)))
+    np.savetxt(csvPath, csvData, fmt=["%.6f", "%d"], delimiter=",", header="Wavelength,Intensity", comments="")
     print(f"[INFO] CSV data saved: {csvPath}")
 
     statusMessage = f"Last Save: {timeNow}"
@@ -635,12 +859,45 @@ fps = args.fps
 #   - Before trying to open a device, we check /sys/class/video4linux/ to filter out
 #     non-capture nodes (only devices with index "0" in their sysfs entry are primary
 #     capture devices - the rest are metadata/output/subdev nodes)
+#   - Each remaining node is also asked for its capabilities (VIDIOC_QUERYCAP ioctl); nodes
+#     that can't capture video (encoders, ISP outputs) are skipped without opening them in OpenCV
+#   - The remaining candidates are tried in parallel - a node that fails can block for hundreds
+#     of milliseconds, so trying them one after another could take seconds; the first working
+#     candidate in /dev order is used and the others are released
 #   - Opens cameras by path string (e.g., "/dev/video14") instead of integer index,
 #     which is more reliable for high device numbers
+#   - Requests MJPG (JPEG-compressed by the camera) instead of raw YUYV: about 10x less data
+#     over USB, which lets the Pi keep up with 30 FPS; the agreed format is printed at startup
+#   - Keeps only 1 frame in the capture buffer so the graph never lags behind the camera
 #   - Sets the resolution to 800x600 and the requested frame rate
 #   - The expected resolution is 800x600 - other resolutions may cause issues
 #####################################################################################################################
 
+VIDIOC_QUERYCAP = 0x80685600      # _IOR('V', 0, struct v4l2_capability) - 104-byte struct
+V4L2_CAPABILITY_FORMAT = "16s32s32sIII12x"  # driver, card, bus_info, version, capabilities, device_caps
+V4L2_CAP_VIDEO_CAPTURE = 0x00000001
+V4L2_CAP_DEVICE_CAPS = 0x80000000  # device_caps field is valid (describes this node only)
+PROBE_WORKERS = 4
+
+
+def canCaptureVideo(devicePath):
+    """Return False if the V4L2 node reports it cannot capture video (True if unsure)."""
+    try:
+        fd = os.open(devicePath, os.O_RDWR | os.O_NONBLOCK)
+    except OSError:
+        return True  # Let the OpenCV probe report the real problem
+    try:
+        buffer = fcntl.ioctl(fd, VIDIOC_QUERYCAP, bytes(struct.calcsize(V4L2_CAPABILITY_FORMAT)))
+    except OSError:
+        return True
+    finally:
+        os.close(fd)
+    capabilities, deviceCaps = struct.unpack(V4L2_CAPABILITY_FORMAT, buffer)[4:6]
+    if capabilities & V4L2_CAP_DEVICE_CAPS:
+        capabilities = deviceCaps
+    return bool(capabilities & V4L2_CAP_VIDEO_CAPTURE)
+
+
 def findCaptureDevices():
     """Find /dev/video* devices that are actual video capture nodes (not metadata/subdev).
     Checks /sys/class/video4linux/ to filter by device index and capability."""
@@ -665,6 +922,10 @@ def findCaptureDevices():
         except Exception:
             continue
 
+        # Skip nodes that report they can't capture video
+        if not canCaptureVideo(devPath):
+            continue
+
         # Read the device name for logging
         nameFile = os.path.join(sysPath, "name")
         try:
@@ -702,17 +963,20 @@ if cap is None:
         for devPath, camName in captureDevices:
             print(f"[INFO]   {devPath} - {camName}")
 
-        for devPath, camName in captureDevices:
-            if devPath == userDevPath:
-                continue  # Already tried this one
-            print(f"[INFO]   Trying {devPath} ({camName})...", end="")
-            cap = tryOpenCamera(devPath)
-            if cap is not None:
-                dev = int(devPath.replace("/dev/video", ""))
-                print(f" OK")
-                break
-            else:
-                print(f" skip")
+        # Probe the other candidates in parallel, then keep the first one (in /dev order) that works
+        probePaths = [devPath for devPath, camName in captureDevices if devPath != userDevPath]
+        if probePaths:
+            with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+                probeResults = list(executor.map(tryOpenCamera, probePaths))
+            for devPath, probeCap in zip(probePaths, probeResults):
+                if probeCap is None:
+                    print(f"[INFO]   {devPath}: skip")
+                elif cap is None:
+                    cap = probeCap
+                    dev = int(devPath.replace("/dev/video", ""))
+                    print(f"[INFO]   {devPath}: OK")
+                else:
+                    probeCap.release()  # Another camera was already chosen
 
 if cap is None:
     print("[ERROR] No working camera found")
@@ -720,6 +984,13 @@ if cap is None:
     print("[INFO] If the camera was just disconnected, unplug and replug it")
     exit(1)
 
+# Ask for MJPG before setting the resolution/FPS (V4L2 only offers some modes once MJPG is
+# selected) and keep just one frame buffered so the graph shows the newest frame
+cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+if not cap.set(cv2.CAP_PROP_BUFFERSIZE, 1):
+    # Not fatal: the background FrameGrabber reads continuously, so the driver's queue is
+    # still emptied as fast as frames arrive and the graph only ever gets the newest one
+    print("[WARN] Camera did not accept a 1-frame buffer; relying on the frame grabber to skip stale frames")
 cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
 cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
 cap.set(cv2.CAP_PROP_FPS, fps)
@@ -727,7 +998,105 @@ cap.set(cv2.CAP_PROP_FPS, fps)
 actualWidth = cap.get(cv2.CAP_PROP_FRAME_WIDTH)
 actualHeight = cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
 actualFps = cap.get(cv2.CAP_PROP_FPS)
-print(f"[INFO] Camera opened: /dev/video{dev} at {int(actualWidth)}x{int(actualHeight)} @ {actualFps} FPS")
+fourccCode = int(cap.get(cv2.CAP_PROP_FOURCC))
+pixelFormat = "".join(chr((fourccCode >> (8 * i)) & 0xFF) for i in range(4)) if fourccCode > 0 else "unknown"
+print(f"[INFO] Camera opened: /dev/video{dev} at {int(actualWidth)}x{int(actualHeight)} @ {actualFps} FPS ({pixelFormat})")
+
+
+
+
+
+#####################################################################################################################
+# Background Frame Grabber
+#   - cap.read() blocks until the camera delivers the next frame, so reading in the main loop
+#     means the graph drawing and the camera wait on each other every frame
+#   - FrameGrabber reads the camera in a background thread and keeps only the newest frame
+#     (a single slot - older frames are simply replaced, never queued up)
+#   - The main loop calls read(), which waits for a frame it hasn't seen yet and returns it
+#     with the same (ret, frame) result as cap.read()
+#
+#   How it works:
+#       1. start() launches a daemon thread that runs _run()
+#       2. _run() calls cap.grab() in a loop, which takes the next frame from the driver without
+#          decoding it. Only when the main loop has already taken the previous frame is the new
+#          one decoded with cap.retrieve() and stored under a lock; frames that arrive while the
+#          main loop is still busy are dropped undecoded (MJPG decoding is the expensive part)
+#        - Frames are decoded into two preallocated images used in turn (a double buffer):
+#          the main loop only asks for a new frame once it has finished with its current one,
+#          so the thread always writes into the image the main loop is not using
+#       3. read() sleeps on a condition variable until a newer frame arrives
+#          (or the camera fails / times out, which returns ret = False)
+#       4. stop() tells the thread to exit and waits for it before the camera is released
+#####################################################################################################################
+
+FRAME_TIMEOUT = 5.0  # Seconds to wait for a new frame before treating the camera as failed
+
+
+class FrameGrabber:
+    """Background thread that keeps the newest camera frame in a single slot."""
+
+    def __init__(self, capture):
+        self.capture = capture
+        self.thread = None
+        self._stop = threading.Event()
+        self._condition = threading.Condition()
+        self._frame = None
+        self._buffers = [None, None]
+        self._frameId = 0
+        self._lastReadId = 0
+        self._failed = False
+
+    def start(self):
+        """Start the background capture thread."""
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Signal the background thread to stop and wait for it to finish."""
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self.thread:
+            self.thread.join(timeout=1.0)
+
+    def read(self):
+        """Wait for a frame newer than the last one returned, like cap.read()."""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._frameId != self._lastReadId or self._failed or self._stop.is_set(),
+                timeout=FRAME_TIMEOUT,
+            )
+            if self._frameId == self._lastReadId:
+                return False, None
+            self._lastReadId = self._frameId
+            return True, self._frame
+
+    def _run(self):
+        """Main loop for the background thread - grabs frames until stopped or the camera fails."""
+        while not self._stop.is_set():
+            ret = self.capture.grab()
+            if ret:
+                with self._condition:
+                    slotEmpty = self._frameId == self._lastReadId
+                if not slotEmpty:
+                    continue  # Main loop hasn't taken the last frame yet - skip decoding this one
+                nextBuffer = (self._frameId + 1) % 2
+                ret, frame = self.capture.retrieve(self._buffers[nextBuffer])
+                self._buffers[nextBuffer] = frame  # Allocated by OpenCV on first use
+            with self._condition:
+                if not ret:
+                    self._failed = True
+                    self._condition.notify_all()
+                    return
+                self._frame = frame
+                self._frameId += 1
+                self._condition.notify_all()
+
+
+grabber = FrameGrabber(cap)
+grabber.start()
 
 
 
@@ -770,8 +1139,11 @@ else:
 #   - recPixels: when True, clicking on the graph records pixel positions for calibration
 #   - clickArray: list of [x, y] positions clicked during pixel recording mode
 #   - cursorX / cursorY: current mouse position on the graph
-#   - intensity: array of intensity values (one per pixel column) - updated every frame
+#   - intensity: array of intensity values (one per pixel column) - updated in place every frame
+#   - rowAverage: the raw 3-row average for the current frame (reused buffer, see Step 4)
+#   - spectrumVertical: the spectrum window image; banner / preview / graph are views into it
 #   - saveMsg: status text showing when data was last saved
+#   - waterfall / waterfallHead: waterfall history as a ring buffer and the row holding the newest line
 #####################################################################################################################
 
 savpoly = DEFAULT_SAVPOLY
@@ -786,11 +1158,27 @@ clickArray = []
 cursorX = 0
 cursorY = 0
 
-intensity = [0] * FRAME_WIDTH
+# Allocated once and overwritten each frame instead of building new arrays per frame.
+# int16 holds every value the graph uses (the 3-row sum is at most 765) at a quarter of
+# the size of the default int64
+intensity = np.zeros(FRAME_WIDTH, dtype=np.int16)
+rowAverage = np.zeros(FRAME_WIDTH, dtype=np.int16)
 saveMsg = "No data saved"
 
-# Blank waterfall image (filled black, updated each frame if waterfall is enabled)
+# Spectrum window image (banner, camera preview and graph stacked), allocated once.
+# The banner and the graph are drawn straight into their part of it through these views,
+# so only the preview strip has to be copied in each frame
+spectrumVertical = np.zeros([STACK_HEIGHT, FRAME_WIDTH, 3], dtype=np.uint8)
+banner = spectrumVertical[:BANNER_HEIGHT]
+preview = spectrumVertical[BANNER_HEIGHT:BANNER_HEIGHT + PREVIEW_HEIGHT]
+graph = spectrumVertical[GRAPH_TOP:]
+
+# Blank waterfall image (filled black, updated each frame if waterfall is enabled).
+# It is a ring buffer: each new row overwrites the oldest one at waterfallHead, and Step 12
+# copies it out newest-first, so nothing has to scroll the whole image every frame
 waterfall = np.zeros([GRAPH_HEIGHT, FRAME_WIDTH, 3], dtype=np.uint8)
+waterfallHead = 0
+waterfallVertical = np.zeros([STACK_HEIGHT, FRAME_WIDTH, 3], dtype=np.uint8)
 
 
 
@@ -799,21 +1187,19 @@ waterfall = np.zeros([GRAPH_HEIGHT, FRAME_WIDTH, 3], dtype=np.uint8)
 # Mouse Event Handler
 #   - Tracks the mouse position (for measurement cursor and pixel recording)
 #   - Records click positions when pixel recording mode is active
-#   - The mouseYOffset accounts for the banner and preview strip above the graph
+#   - GRAPH_TOP accounts for the banner and preview strip above the graph
 #####################################################################################################################
 
 def handleMouse(event, x, y, flags, param):
     """Handle mouse move and click events on the spectrum window."""
     global clickArray, cursorX, cursorY
-    mouseYOffset = BANNER_HEIGHT + PREVIEW_HEIGHT
-
     if event == cv2.EVENT_MOUSEMOVE:
         cursorX = x
         cursorY = y
 
     if event == cv2.EVENT_LBUTTONDOWN:
         mouseX = x
-        mouseY = y - mouseYOffset
+        mouseY = y - GRAPH_TOP
         clickArray.append([mouseX, mouseY])
 
 cv2.setMouseCallback(TITLE_SPECTRUM, handleMouse)
@@ -825,6 +1211,9 @@ cv2.setMouseCallback(TITLE_SPECTRUM, handleMouse)
 # Load Calibration Data and Generate Graticule
 #   - readCalibration() loads caldata.txt (or defaults if not found)
 #   - generateGraticule() computes pixel positions for the 10 nm and 50 nm grid lines
+#   - makeGraphBackground() draws those lines onto the white graph background
+#   - makeWaterfallDashes() finds the pixels of the dashed 50 nm lines on the waterfall
+#   - makeColumnColors() looks up the display color of every pixel column's wavelength
 #   - These are computed once on startup and again after every recalibration
 #####################################################################################################################
 
@@ -837,6 +1226,9 @@ calMsg3 = calData[3]
 graticuleData = generateGraticule(wavelengthData)
 tens = graticuleData[0]
 fifties = graticuleData[1]
+graphBackground = makeGraphBackground(tens, fifties)
+waterfallDashes = makeWaterfallDashes(fifties)
+columnColors = makeColumnColors(wavelengthData)
 
 font = cv2.FONT_HERSHEY_SIMPLEX
 
@@ -865,6 +1257,7 @@ print("[INFO] Press 'h' for peak hold, 'm' for measurement cursor, 'p' to record
 # Signal handler for clean Ctrl+C shutdown (releases the camera so /dev/videoN stays available)
 def cleanShutdown(signum, frame):
     print("\n[INFO] Ctrl+C detected - releasing camera and closing windows...")
+    grabber.stop()
     cap.release()
     cv2.destroyAllWindows()
     print("[INFO] Spectrometer shut down")
@@ -872,8 +1265,16 @@ def cleanShutdown(signum, frame):
 
 signal.signal(signal.SIGINT, cleanShutdown)
 
+# Static part of the status banner: dark gray background with the title lines
+bannerTemplate = np.empty([BANNER_HEIGHT, FRAME_WIDTH, 3], dtype=np.uint8)
+bannerTemplate[:] = (40, 40, 40)
+cv2.putText(bannerTemplate, "LUSI Science Module - Spectrometer", (10, 25), font, 0.6, (0, 200, 255), 1, cv2.LINE_AA)
+cv2.putText(bannerTemplate, f"Device: /dev/video{dev}  |  FPS: {actualFps}", (10, 50), font, 0.4, (180, 180, 180), 1, cv2.LINE_AA)
+cv2.putText(bannerTemplate, "Press 'q' to quit  |  's' to save  |  'h' for help", (10, 70), font, 0.35, (140, 140, 140), 1, cv2.LINE_AA)
+lastBannerState = None  # Forces the first frame to draw the whole banner
+
 while cap.isOpened():
-    ret, frame = cap.read()
+    ret, frame = grabber.read()
 
     if not ret:
         print("[ERROR] Failed to capture frame from camera")
@@ -883,139 +1284,114 @@ while cap.isOpened():
     # ============================================================
     # Step 1: Crop the camera frame to a horizontal band centered on the spectrum
     # ============================================================
-    cropY = int((FRAME_HEIGHT / 2) - 40)
-    cropX = 0
-    cropH = PREVIEW_HEIGHT
-    cropW = FRAME_WIDTH
-    cropped = frame[cropY:cropY + cropH, cropX:cropX + cropW]
+    # (the crop position and sample rows are fixed, see CROP_Y / SAMPLE_ROW)
+    cropped = frame[CROP_Y:CROP_Y + PREVIEW_HEIGHT, :FRAME_WIDTH]
 
-    # Convert to grayscale for intensity measurement
-    bwImage = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY)
-    rows, cols = bwImage.shape
-    halfway = int(rows / 2)
+    # Convert the 3 sampled rows (centered on the band) to grayscale for intensity measurement
+    bwImage = cv2.cvtColor(cropped[SAMPLE_ROW - 1:SAMPLE_ROW + 2], cv2.COLOR_BGR2GRAY)
 
     # Draw indicator lines on the preview showing where intensity is sampled (3px region)
-    cv2.line(cropped, (0, halfway - 2), (FRAME_WIDTH, halfway - 2), (255, 255, 255), 1)
-    cv2.line(cropped, (0, halfway + 2), (FRAME_WIDTH, halfway + 2), (255, 255, 255), 1)
+    cv2.line(cropped, (0, SAMPLE_ROW - 2), (FRAME_WIDTH, SAMPLE_ROW - 2), (255, 255, 255), 1)
+    cv2.line(cropped, (0, SAMPLE_ROW + 2), (FRAME_WIDTH, SAMPLE_ROW + 2), (255, 255, 255), 1)
 
 
     # ============================================================
     # Step 2: Build the status banner (dark background with text)
     # ============================================================
-    banner = np.zeros([BANNER_HEIGHT, FRAME_WIDTH, 3], dtype=np.uint8)
-    banner[:] = (40, 40, 40)  # Dark gray background
-
-    # Title text
-    cv2.putText(banner, "LUSI Science Module - Spectrometer", (10, 25), font, 0.6, (0, 200, 255), 1, cv2.LINE_AA)
-    cv2.putText(banner, f"Device: /dev/video{dev}  |  FPS: {actualFps}", (10, 50), font, 0.4, (180, 180, 180), 1, cv2.LINE_AA)
-    cv2.putText(banner, "Press 'q' to quit  |  's' to save  |  'h' for help", (10, 70), font, 0.35, (140, 140, 140), 1, cv2.LINE_AA)
-
-    # Calibration status (right side)
-    cv2.putText(banner, calMsg1, (490, 20), font, 0.4, (0, 255, 255), 1, cv2.LINE_AA)
-    cv2.putText(banner, calMsg2, (490, 38), font, 0.4, (0, 255, 255), 1, cv2.LINE_AA)
-    cv2.putText(banner, calMsg3, (490, 56), font, 0.4, (0, 255, 255), 1, cv2.LINE_AA)
-    cv2.putText(banner, saveMsg, (490, 74), font, 0.4, (0, 255, 255), 1, cv2.LINE_AA)
-
-    # Processing status (far right)
-    holdMsg = "Holdpeaks ON" if holdPeaks else "Holdpeaks OFF"
-    cv2.putText(banner, holdMsg, (660, 20), font, 0.35, (0, 255, 255), 1, cv2.LINE_AA)
-    cv2.putText(banner, f"Savgol: {savpoly}", (660, 38), font, 0.35, (0, 255, 255), 1, cv2.LINE_AA)
-    cv2.putText(banner, f"Peak Dist: {mindist}", (660, 56), font, 0.35, (0, 255, 255), 1, cv2.LINE_AA)
-    cv2.putText(banner, f"Threshold: {thresh}", (660, 74), font, 0.35, (0, 255, 255), 1, cv2.LINE_AA)
+    # Only redrawn when one of the status values changes (usually after a key press); the
+    # title lines come from bannerTemplate, which is drawn once before the loop
+    bannerState = (calMsg1, calMsg2, calMsg3, saveMsg, holdPeaks, savpoly, mindist, thresh)
+    if bannerState != lastBannerState:
+        lastBannerState = bannerState
+        np.copyto(banner, bannerTemplate)
+
+        # Calibration status (right side)
+        cv2.putText(banner, calMsg1, (490, 20), font, 0.4, (0, 255, 255), 1, cv2.LINE_AA)
+        cv2.putText(banner, calMsg2, (490, 38), font, 0.4, (0, 255, 255), 1, cv2.LINE_AA)
+        cv2.putText(banner, calMsg3, (490, 56), font, 0.4, (0, 255, 255), 1, cv2.LINE_AA)
+        cv2.putText(banner, saveMsg, (490, 74), font, 0.4, (0, 255, 255), 1, cv2.LINE_AA)
+
+        # Processing status (far right)
+        holdMsg = "Holdpeaks ON" if holdPeaks else "Holdpeaks OFF"
+        cv2.putText(banner, holdMsg, (660, 20), font, 0.35, (0, 255, 255), 1, cv2.LINE_AA)
+        cv2.putText(banner, f"Savgol: {savpoly}", (660, 38), font, 0.35, (0, 255, 255), 1, cv2.LINE_AA)
+        cv2.putText(banner, f"Peak Dist: {mindist}", (660, 56), font, 0.35, (0, 255, 255), 1, cv2.LINE_AA)
+        cv2.putText(banner, f"Threshold: {thresh}", (660, 74), font, 0.35, (0, 255, 255), 1, cv2.LINE_AA)
 
 
     # ============================================================
     # Step 3: Build the spectrum graph (white background with graticule)
     # ============================================================
-    graph = np.zeros([GRAPH_HEIGHT, FRAME_WIDTH, 3], dtype=np.uint8)
-    graph.fill(255)
-
-    # Vertical graticule lines every 10 nm (light gray)
-    for position in tens:
-        cv2.line(graph, (position, 15), (position, GRAPH_HEIGHT), (200, 200, 200), 1)
-
-    # Vertical graticule lines every 50 nm (black, with labels)
-    textOffset = 12
-    for posData in fifties:
-        cv2.line(graph, (posData[0], 15), (posData[0], GRAPH_HEIGHT), (0, 0, 0), 1)
-        cv2.putText(graph, f"{posData[1]}nm", (posData[0] - textOffset, 12), font, 0.4, (0, 0, 0), 1, cv2.LINE_AA)
-
-    # Horizontal reference lines every 64 pixels (light gray)
-    for i in range(GRAPH_HEIGHT):
-        if i >= 64 and i % 64 == 0:
-            cv2.line(graph, (0, i), (FRAME_WIDTH, i), (100, 100, 100), 1)
+    # The background only changes on recalibration (see makeGraphBackground), so it is copied in
+    np.copyto(graph, graphBackground)
+    textOffset = LABEL_TEXT_OFFSET
 
 
     # ============================================================
     # Step 4: Read intensity data from the camera (3-row averaging)
     # ============================================================
-    for i in range(cols):
-        dataMinus1 = bwImage[halfway - 1, i]
-        dataZero = bwImage[halfway, i]
-        dataPlus1 = bwImage[halfway + 1, i]
-        data = (int(dataMinus1) + int(dataZero) + int(dataPlus1)) / 3
-        data = np.uint8(data)
-
-        if holdPeaks:
-            if data > intensity[i]:
-                intensity[i] = data
-        else:
-            intensity[i] = data
+    # Average the 3 rows for every column at once (integer division rounds down like the old
+    # per-pixel uint8 conversion). Kept as signed ints: the smoothing filter's edge padding
+    # subtracts neighboring values, which would wrap around in uint8.
+    # Both arrays are preallocated and updated in place.
+    bwImage.sum(axis=0, dtype=np.int16, out=rowAverage)
+    np.floor_divide(rowAverage, 3, out=rowAverage)
+
+    if holdPeaks:
+        np.maximum(intensity, rowAverage, out=intensity)
+    else:
+        np.copyto(intensity, rowAverage)
 
 
     # ============================================================
     # Step 5: Update waterfall display (if enabled)
     # ============================================================
     if dispWaterfall:
-        wData = np.zeros([1, FRAME_WIDTH, 3], dtype=np.uint8)
-        for idx in range(len(intensity)):
-            rgb = wavelengthToRgb(round(wavelengthData[idx]))
-            luminosity = intensity[idx] / 255
-            bVal = int(round(rgb[0] * luminosity))
-            gVal = int(round(rgb[1] * luminosity))
-            rVal = int(round(rgb[2] * luminosity))
-            wData[0, idx] = (rVal, gVal, bVal)
-        waterfall = np.insert(waterfall, 0, wData, axis=0)
-        waterfall = waterfall[:-1].copy()
+        # Each column's color scaled by its brightness, all columns at once (clipped because
+        # peak-hold values come from the smoothed signal, which can overshoot 0-255)
+        luminosity = intensity / 255
+        waterfallRow = np.clip(np.round(columnColors * luminosity[:, np.newaxis]), 0, 255)
+        # Overwrite the oldest row; it becomes the newest (top) row when displayed
+        waterfallHead = (waterfallHead - 1) % GRAPH_HEIGHT
+        waterfall[waterfallHead] = waterfallRow
 
 
     # ============================================================
     # Step 6: Apply smoothing filter (unless holding peaks)
     # ============================================================
     if not holdPeaks:
-        intensity = savitzkyGolay(intensity, 17, savpoly)
-        intensity = np.array(intensity)
-        intensity = intensity.astype(int)
+        # Truncate the float result back into the integer buffer (same as astype(int))
+        np.copyto(intensity, savitzkyGolay(intensity, 17, savpoly), casting="unsafe")
 
 
     # ============================================================
     # Step 7: Draw the intensity data as colored vertical bars
     # ============================================================
-    for idx in range(len(intensity)):
-        rgb = wavelengthToRgb(round(wavelengthData[idx]))
-        r = rgb[0]
-        g = rgb[1]
-        b = rgb[2]
-        # OpenCV origin is top-left, so we draw from the bottom up
-        cv2.line(graph, (idx, GRAPH_HEIGHT), (idx, GRAPH_HEIGHT - intensity[idx]), (b, g, r), 1)
-        cv2.line(graph, (idx, GRAPH_HEIGHT - 1 - intensity[idx]), (idx, GRAPH_HEIGHT - intensity[idx]), (0, 0, 0), 1, cv2.LINE_AA)
+    # OpenCV origin is top-left, so each bar fills its column from row GRAPH_HEIGHT - intensity
+    # down to the bottom. All bars are filled at once: a mask marks the covered pixels and
+    # each column takes its color from the precomputed columnColors strip.
+    barMask = GRAPH_ROWS >= (GRAPH_HEIGHT - intensity)
+    np.copyto(graph, columnColors[np.newaxis], where=barMask[:, :, np.newaxis])
+
+    # Black outline along the top of every bar: the bar's top pixel and the one above it,
+    # set directly for all columns (rows that fall outside the graph are skipped)
+    for outlineRows in (GRAPH_HEIGHT - 1 - intensity, GRAPH_HEIGHT - intensity):
+        onGraph = (outlineRows >= 0) & (outlineRows < GRAPH_HEIGHT)
+        graph[outlineRows[onGraph], GRAPH_COLUMNS[onGraph]] = 0
 
 
     # ============================================================
     # Step 8: Detect peaks and draw labels
     # ============================================================
-    threshVal = int(thresh)
-    maxIntensity = max(intensity) if max(intensity) > 0 else 1
-    indexes = peakIndexes(intensity, thres=threshVal / maxIntensity, minDist=mindist)
+    maxIntensity = max(int(intensity.max()), 1)  # Avoid dividing by zero on a dark frame
+    indexes = peakIndexes(intensity, thres=thresh / maxIntensity, minDist=mindist)
 
     for i in indexes:
-        height = intensity[i]
+        height = int(intensity[i])
         yPos = GRAPH_HEIGHT - 10 - height
         wavelength = round(wavelengthData[i], 1)
-        # Yellow label box with black border
-        cv2.rectangle(graph, ((i - textOffset) - 2, yPos), ((i - textOffset) + 60, yPos - 15), (0, 255, 255), -1)
-        cv2.rectangle(graph, ((i - textOffset) - 2, yPos), ((i - textOffset) + 60, yPos - 15), (0, 0, 0), 1)
-        cv2.putText(graph, f"{wavelength}nm", (i - textOffset, yPos - 3), font, 0.4, (0, 0, 0), 1, cv2.LINE_AA)
+        # Yellow label box with black border (pre-rendered, see makePeakLabelSprite)
+        drawSprite(graph, makePeakLabelSprite(f"{wavelength}nm"), (i - textOffset) - 2, yPos - (PEAK_LABEL_HEIGHT - 1))
         # Flagpole connecting label to the peak
         cv2.line(graph, (i, yPos), (i, yPos + 10), (0, 0, 0), 1)
 
@@ -1024,7 +1400,7 @@ while cap.isOpened():
     # Step 9: Draw measurement cursor (if active)
     # ============================================================
     if measure:
-        adjY = cursorY - (BANNER_HEIGHT + PREVIEW_HEIGHT)
+        adjY = cursorY - GRAPH_TOP
         cv2.line(graph, (cursorX, adjY - 20), (cursorX, adjY + 20), (0, 0, 0), 1)
         cv2.line(graph, (cursorX - 20, adjY), (cursorX + 20, adjY), (0, 0, 0), 1)
         if 0 <= cursorX < FRAME_WIDTH:
@@ -1035,7 +1411,7 @@ while cap.isOpened():
     # Step 10: Draw pixel recording cursor and selected points (if active)
     # ============================================================
     if recPixels:
-        adjY = cursorY - (BANNER_HEIGHT + PREVIEW_HEIGHT)
+        adjY = cursorY - GRAPH_TOP
         cv2.line(graph, (cursorX, adjY - 20), (cursorX, adjY + 20), (0, 0, 0), 1)
         cv2.line(graph, (cursorX - 20, adjY), (cursorX + 20, adjY), (0, 0, 0), 1)
         if 0 <= cursorX < FRAME_WIDTH:
@@ -1056,11 +1432,12 @@ while cap.isOpened():
     # ============================================================
     # Step 11: Assemble and display the spectrum window
     # ============================================================
-    spectrumVertical = np.vstack((banner, cropped, graph))
+    # The banner and graph were drawn in place; only the preview strip is copied in
+    preview[:] = cropped
 
     # Dividing lines between sections
     cv2.line(spectrumVertical, (0, BANNER_HEIGHT), (FRAME_WIDTH, BANNER_HEIGHT), (255, 255, 255), 1)
-    cv2.line(spectrumVertical, (0, BANNER_HEIGHT + PREVIEW_HEIGHT), (FRAME_WIDTH, BANNER_HEIGHT + PREVIEW_HEIGHT), (255, 255, 255), 1)
+    cv2.line(spectrumVertical, (0, GRAPH_TOP), (FRAME_WIDTH, GRAPH_TOP), (255, 255, 255), 1)
 
     cv2.imshow(TITLE_SPECTRUM, spectrumVertical)
 
@@ -1069,19 +1446,21 @@ while cap.isOpened():
     # Step 12: Assemble and display the waterfall window (if enabled)
     # ============================================================
     if dispWaterfall:
-        waterfallVertical = np.vstack((banner, cropped, waterfall))
+        # Stack into the reused display buffer; the ring buffer is unrolled newest row first
+        waterfallVertical[:BANNER_HEIGHT] = banner
+        waterfallVertical[BANNER_HEIGHT:BANNER_HEIGHT + PREVIEW_HEIGHT] = cropped
+        waterfallArea = waterfallVertical[GRAPH_TOP:]
+        waterfallArea[:GRAPH_HEIGHT - waterfallHead] = waterfall[waterfallHead:]
+        waterfallArea[GRAPH_HEIGHT - waterfallHead:] = waterfall[:waterfallHead]
 
         # Dividing lines
         cv2.line(waterfallVertical, (0, BANNER_HEIGHT), (FRAME_WIDTH, BANNER_HEIGHT), (255, 255, 255), 1)
-        cv2.line(waterfallVertical, (0, BANNER_HEIGHT + PREVIEW_HEIGHT), (FRAME_WIDTH, BANNER_HEIGHT + PREVIEW_HEIGHT), (255, 255, 255), 1)
+        cv2.line(waterfallVertical, (0, GRAPH_TOP), (FRAME_WIDTH, GRAPH_TOP), (255, 255, 255), 1)
 
-        # Dashed graticule lines every 50 nm on the waterfall
+        # Dashed graticule lines every 50 nm on the waterfall (positions from makeWaterfallDashes)
+        waterfallVertical[waterfallDashes[0]] = 0
+        waterfallVertical[waterfallDashes[1]] = 255
         for posData in fifties:
-            yStart = BANNER_HEIGHT + PREVIEW_HEIGHT + 2
-            for y in range(yStart, STACK_HEIGHT):
-                if y % 20 == 0:
-                    cv2.line(waterfallVertical, (posData[0], y), (posData[0], y + 1), (0, 0, 0), 2)
-                    cv2.line(waterfallVertical, (posData[0], y), (posData[0], y + 1), (255, 255, 255), 1)
             cv2.putText(waterfallVertical, f"{posData[1]}nm", (posData[0] - textOffset, STACK_HEIGHT - 5), font, 0.4, (255, 255, 255), 1, cv2.LINE_AA)
 
         cv2.imshow(TITLE_WATERFALL, waterfallVertical)
@@ -1092,6 +1471,9 @@ while cap.isOpened():
     # ============================================================
     keyPress = cv2.waitKey(1)
 
+    if keyPress == -1:
+        continue  # No key pressed (most frames) - nothing below applies
+
     if keyPress == ord("q"):
         print("[INFO] Quit requested")
         break
@@ -1123,6 +1505,10 @@ while cap.isOpened():
                 graticuleData = generateGraticule(wavelengthData)
                 tens = graticuleData[0]
                 fifties = graticuleData[1]
+                graphBackground = makeGraphBackground(tens, fifties)
+                waterfallDashes = makeWaterfallDashes(fifties)
+                columnColors = makeColumnColors(wavelengthData)
+                PEAK_LABEL_SPRITES.clear()  # Old labels won't come back with the new calibration
 
     elif keyPress == ord("x"):
         clickArray = []
@@ -1140,34 +1526,27 @@ while cap.isOpened():
         state = "ON" if recPixels else "OFF"
         print(f"[INFO] Pixel recording mode toggled {state}")
 
-    elif keyPress == ord("o"):
-        savpoly = min(savpoly + 1, 15)
-
-    elif keyPress == ord("l"):
-        savpoly = max(savpoly - 1, 0)
-
-    elif keyPress == ord("i"):
-        mindist = min(mindist + 1, 100)
-
-    elif keyPress == ord("k"):
-        mindist = max(mindist - 1, 0)
+    elif keyPress in SAVPOLY_KEYS:
+        savpoly = min(max(savpoly + SAVPOLY_KEYS[keyPress], 0), 15)
 
-    elif keyPress == ord("u"):
-        thresh = min(thresh + 1, 100)
+    elif keyPress in MINDIST_KEYS:
+        mindist = min(max(mindist + MINDIST_KEYS[keyPress], 0), 100)
 
-    elif keyPress == ord("j"):
-        thresh = max(thresh - 1, 0)
+    elif keyPress in THRESH_KEYS:
+        thresh = min(max(thresh + THRESH_KEYS[keyPress], 0), 100)
 
 
 
 
 #####################################################################################################################
 # Cleanup
+#   - Stops the frame grabber thread
 #   - Releases the USB camera
 #   - Closes all OpenCV windows
 #####################################################################################################################
 
 print("[INFO] Releasing camera and closing windows...")
+grabber.stop()
 cap.release()
 cv2.destroyAllWindows()
 print("[INFO] Spectrometer shut down")
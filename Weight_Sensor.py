@@ -13,8 +13,8 @@
 #
 # How it works:
 #   1. On startup, the script "tares" (zeroes) the load cell so the current reading becomes 0 grams
-#   2. It then enters a continuous loop, printing the measured weight once per second
-#   3. Between reads, the HX711 is powered down and back up to reduce sensor drift
+#   2. A background thread then reads the HX711 continuously, one sample at a time
+#   3. Once per second the main loop prints the median of the most recent samples
 #   4. Press CTRL+C to stop the script
 #####################################################################################################################
 
@@ -24,9 +24,13 @@
 #####################################################################################################################
 # Importing Program Libraries
 #   - time:
-#       - Adds delays to the program (1-second pause between weight readings)
-#       - Prevents the script from reading the sensor too rapidly, which would
-#         increase noise and power consumption
+#       - Adds delays to the program (1-second pause between printed weight readings)
+#   - threading:
+#       - Runs the sensor reads in a background thread so sampling never stops while
+#         the main loop is waiting or printing
+#   - collections / statistics:
+#       - deque keeps only the most recent samples; median() combines them into one
+#         reading that ignores the occasional bad sample
 #   - RPi.GPIO:
 #       - Controls the Raspberry Pi's GPIO (General Purpose Input/Output) pins
 #       - Provides GPIO cleanup on exit to release pins back to the system so
@@ -38,6 +42,9 @@
 #####################################################################################################################
 
 import time
+import threading
+from collections import deque
+from statistics import median
 import RPi.GPIO as GPIO
 from hx711 import HX711
 
@@ -64,9 +71,13 @@ SCK_PIN = 17  # HX711 clock input --> GPIO 17
 #   - The HX711 reads analog voltage from the load cell and converts it to a digital value
 #   - The load cell works by measuring tiny deformations caused by weight - the HX711
 #     amplifies this signal so the Raspberry Pi can read it accurately
+#   - Nothing here runs on import; main() at the bottom creates the load cell, so other
+#     scripts can import this file without touching the GPIO pins
 #####################################################################################################################
 
-hx = HX711(DT_PIN, SCK_PIN)
+def setupLoadCell():
+    """Create the HX711 interface for the load cell."""
+    return HX711(DT_PIN, SCK_PIN)
 
 
 
@@ -80,35 +91,89 @@ hx = HX711(DT_PIN, SCK_PIN)
 #     whatever is on it will be subtracted from all future readings
 #####################################################################################################################
 
-print("[INFO] Taring... Please remove all weight from the load cell.")
-hx.tare()
-print("[INFO] Tare complete.")
+def tareLoadCell(hx):
+    """Zero the load cell so the current reading becomes 0 grams."""
+    print("[INFO] Taring... Please remove all weight from the load cell.")
+    hx.tare()
+    print("[INFO] Tare complete.")
 
 
 
 
 #####################################################################################################################
 # Reading Weight in a Continuous Loop
-#   - Collects averaged weight data from the HX711 (average of 5 samples per reading
-#     to reduce noise and give more stable measurements)
-#   - Prints weight in grams (formatted to two decimal places)
-#   - Powers the HX711 down and back up between reads to reduce sensor drift (the tiny
-#     gradual change in readings that happens when the chip gets warm)
-#   - Runs until manually stopped with a keyboard interrupt (CTRL+C)
+#   - A background thread (sampleLoop) reads one sample at a time from the HX711 and
+#     appends it to a deque that holds the last SAMPLE_WINDOW samples (older ones drop off)
+#   - Once per second the main loop prints the median of those samples in grams
+#     (formatted to two decimal places); the median keeps a single noisy read from
+#     moving the result, like the old 5-sample average but without waiting for 5 new reads
+#   - The HX711 stays powered: reading it continuously keeps the chip settled, while
+#     powering it down and up every second made it restart its conversions each time
+#   - Runs until manually stopped with a keyboard interrupt (CTRL+C); the sampling thread
+#     is stopped before the GPIO pins are cleaned up
+#   - If reading the HX711 fails, the sampling thread records the error and stops; the
+#     main loop then reports it and returns instead of printing the last (stale) samples
+#####################################################################################################################
+
+SAMPLE_WINDOW = 5  # Number of recent samples combined into each printed reading
+
+
+def sampleLoop(hx, samples, stopEvent, errors):
+    """Read single weight samples into the samples deque until stopEvent is set or a read fails."""
+    try:
+        while not stopEvent.is_set():
+            samples.append(hx.get_weight(1))
+    except Exception as e:
+        errors.append(e)  # Reported by readWeightLoop(), which can't see this thread's exceptions
+
+
+def readWeightLoop(hx):
+    """Print the weight once per second until interrupted."""
+    samples = deque(maxlen=SAMPLE_WINDOW)
+    stopEvent = threading.Event()
+    errors = []
+    sampler = threading.Thread(target=sampleLoop, args=(hx, samples, stopEvent, errors), daemon=True)
+    sampler.start()
+
+    try:
+        while True:
+            time.sleep(1)
+            if not sampler.is_alive():
+                reason = errors[0] if errors else "sampling thread stopped"
+                print(f"[ERROR] Reading the load cell failed ({reason}). Stopping weight readings.")
+                return
+            if not samples:
+                continue  # No sample yet (the HX711 is still starting up)
+            weight = median(list(samples))
+            weightLine = f"Weight: {weight:.2f} g"
+            print(weightLine)
+    finally:
+        stopEvent.set()
+        sampler.join(timeout=1)
+
+
+
+
+#####################################################################################################################
+# Main Execution and Cleanup
+#   - Only runs when the script is executed directly (not when imported)
+#   - Creates and tares the load cell, then reads weight until CTRL+C
 #   - GPIO pins are always cleaned up on exit (even if the program crashes) so other
 #     programs can use the pins without conflicts
 #####################################################################################################################
 
-try:
-    while True:
-        weight = hx.get_weight(5)  # Average of 5 samples for stability
-        weightLine = f"Weight: {weight:.2f} g"
-        print(weightLine)
-        hx.power_down()
-        hx.power_up()
-        time.sleep(1)
-except KeyboardInterrupt:
-    print("[INFO] Exiting... Program stopped.")
-finally:
-    GPIO.cleanup()
-    print("[INFO] GPIO cleaned up safely.")
+def main():
+    """Set up the load cell and print weight readings until stopped."""
+    try:
+        hx = setupLoadCell()
+        tareLoadCell(hx)
+        readWeightLoop(hx)
+    except KeyboardInterrupt:
+        print("[INFO] Exiting... Program stopped.")
+    finally:
+        GPIO.cleanup()
+        print("[INFO] GPIO cleaned up safely.")
+
+
+if __name__ == "__main__":
+    main()